@@ -0,0 +1,19 @@
+import logging
+from lambdakube.custom_resource import Dispatcher
+import json
+
+logging.basicConfig()
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+dispatcher = Dispatcher()
+
+
+def handler(event, context):
+    print(event)
+    dispatcher.handle(event, context)
+
+
+if __name__ == "__main__":
+    event = json.loads(open("create.event.json", 'r').read())
+    handler(event, "")
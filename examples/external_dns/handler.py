@@ -1,7 +1,9 @@
 import logging
 import os
-from lambdakube.lambda_kube import LambdaKube
-from lambdakube.external_dns import ExternalDNS
+from lambdakube import registry
+from lambdakube import custom_resource
+from lambdakube.external_dns import IMAGE, ExternalDNS
+from functools import partial
 import lambdakube.cfn_response as cfnresponse
 
 logging.basicConfig()
@@ -9,43 +11,71 @@ logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
 
+def operation_status(result, request_type):
+    registry.report_result(
+        os.environ['EKS_CLUSTER_NAME'],
+        os.environ['AWS_DEFAULT_REGION'],
+        result
+    )
+    if result.skipped:
+        logging.error(f'ran out of time {result.report()}')
+        return cfnresponse.FAILED
+    if request_type != 'Delete' and custom_resource.failed_operations(result):
+        logging.error(f'failed {result.report()}')
+        return cfnresponse.FAILED
+    return cfnresponse.SUCCESS
+
+
+def component(configuration, properties):
+    return ExternalDNS(
+        configuration=configuration,
+        role_arn=os.environ['EXTERNAL_DNS_CONTROLLER_ROLE_ARN'],
+        dns_domain=os.environ['DNS_DOMAIN'],
+        image=properties.get('Image', IMAGE),
+    )
+
+
 def handler(event, context):
     print(event)
-    configuration = LambdaKube(
-        cluster_id=os.environ['EKS_CLUSTER_NAME'],
-        region=os.environ['AWS_DEFAULT_REGION'],
-        username=os.environ['LAMBDA_EXECUTION_ROLE_ARN']
-    ).get_config()
+    status = cfnresponse.FAILED
     try:
+        configuration = registry.get_api_client(
+            cluster_id=os.environ['EKS_CLUSTER_NAME'],
+            region=os.environ['AWS_DEFAULT_REGION'],
+            username=os.environ['LAMBDA_EXECUTION_ROLE_ARN']
+        )
         if event['RequestType'] == 'Create':
             logging.info(event['RequestType'])
-            ExternalDNS(
-                configuration=configuration,
-                role_arn=os.environ['EXTERNAL_DNS_CONTROLLER_ROLE_ARN'],
-                dns_domain=os.environ['DNS_DOMAIN']
-            ).create()
-            status = cfnresponse.SUCCESS
+            result = component(
+                configuration,
+                event['ResourceProperties'],
+            ).apply(deadline=context)
+            status = operation_status(result, event['RequestType'])
         elif event['RequestType'] == 'Update':
             logging.info(event['RequestType'])
-            ExternalDNS(
-                configuration=configuration,
-                role_arn=os.environ['EXTERNAL_DNS_CONTROLLER_ROLE_ARN'],
-                dns_domain=os.environ['DNS_DOMAIN']
-            ).patch()
-            status = cfnresponse.SUCCESS
+            result = custom_resource.update(
+                event,
+                partial(component, configuration),
+                deadline=context,
+            )
+            status = operation_status(result, event['RequestType'])
         elif event['RequestType'] == 'Delete':
             logging.info(event['RequestType'])
-            ExternalDNS(
-                configuration=configuration,
-                role_arn=os.environ['EXTERNAL_DNS_CONTROLLER_ROLE_ARN'],
-                dns_domain=os.environ['DNS_DOMAIN']
-            ).delete()
-            status = cfnresponse.SUCCESS
+            result = component(
+                configuration,
+                event['ResourceProperties'],
+            ).delete(deadline=context)
+            status = operation_status(result, event['RequestType'])
         else:
             logging.error('Unhandled exception', exc_info=True)
             status = cfnresponse.FAILED
     except Exception as e:
         logging.error(f'Unhandled exception {e}', exc_info=True)
+        registry.report_error(
+            os.environ['EKS_CLUSTER_NAME'],
+            os.environ['AWS_DEFAULT_REGION'],
+            e
+        )
         status = cfnresponse.FAILED
     finally:
         cfnresponse.send(event, context, status, {})
@@ -2,15 +2,46 @@
 """lambdakube is a toolkit for configuring
 AWS EKS clusters via lambda functions
 """
-from lambdakube.lambda_kube import LambdaKube, metadata
-from lambdakube.external_dns import ExternalDNS
-from lambdakube.alb_ingress import ALBIngress
-from lambdakube.cloudwatch_agent import CloudWatchAgent
+import importlib
+
 __all__ = [
     'LambdaKube',
     'metadata',
     'ExternalDNS',
     'ALBIngress',
-    'CloudWatchAgent'
+    'CloudWatchAgent',
+    'prime',
+    'after_restore',
+    'get_api_client',
+    'Dispatcher',
+    'Stack',
 ]
 __version__ = "1"
+
+# attributes are imported on first use so that importing the package does
+# not load kubernetes, botocore or yaml
+_LAZY_ATTRIBUTES = {
+    'LambdaKube': 'lambdakube.lambda_kube',
+    'metadata': 'lambdakube.lambda_kube',
+    'ExternalDNS': 'lambdakube.external_dns',
+    'ALBIngress': 'lambdakube.alb_ingress',
+    'CloudWatchAgent': 'lambdakube.cloudwatch_agent',
+    'prime': 'lambdakube.priming',
+    'after_restore': 'lambdakube.priming',
+    'get_api_client': 'lambdakube.registry',
+    'Dispatcher': 'lambdakube.custom_resource',
+    'Stack': 'lambdakube.stack',
+}
+
+
+def __getattr__(name):
+    module_name = _LAZY_ATTRIBUTES.get(name)
+    if module_name is None:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    value = getattr(importlib.import_module(module_name), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + list(_LAZY_ATTRIBUTES))
@@ -1,11 +1,11 @@
+from lambdakube.component import Component
 from lambdakube.lambda_kube import metadata
 import kubernetes.client as client
-import kubernetes.client.rest
 
 IMAGE = 'docker.io/amazon/aws-alb-ingress-controller:v1.1.4'
 
 
-class ALBIngress(object):
+class ALBIngress(Component):
     def __init__(self,
                  name='alb-ingress-controller',
                  namespace='kube-system',
@@ -30,154 +30,116 @@ class ALBIngress(object):
 
     @property
     def apps_v1_api(self):
-        return client.AppsV1Api(self.configuration)
+        return self._api(client.AppsV1Api)
 
     @property
     def core_v1_api(self):
-        return client.CoreV1Api(self.configuration)
+        return self._api(client.CoreV1Api)
 
     @property
     def rbac_v1_api(self):
-        return client.RbacAuthorizationV1beta1Api(self.configuration)
+        return self._api(client.RbacAuthorizationV1beta1Api)
 
     @property
     def labels(self):
         return dict({'app.kubernetes.io/name': self.name})
 
-    def create(self):
+    def resources(self):
         return [
-            self._create_deployment(),
-            self._create_service_account(),
-            self._create_cluster_role(),
-            self._create_cluster_role_binding(),
+            self._resource('service_account', self._service_account),
+            self._resource('cluster_role', self._cluster_role),
+            self._resource('cluster_role_binding', self._cluster_role_binding,
+                           depends_on=['service_account', 'cluster_role']),
+            self._resource('deployment', self._deployment,
+                           depends_on=['cluster_role_binding']),
         ]
 
-    def patch(self):
-        return [
-            self._patch_deployment(),
-            self._patch_service_account(),
-            self._patch_cluster_role(),
-            self._patch_cluster_role_binding(),
-        ]
-
-    def delete(self):
-        return [
-            self._delete_deployment(),
-            self._delete_service_account(),
-            self._delete_cluster_role(),
-            self._delete_cluster_role_binding(),
-        ]
-
-    def _create_deployment(self):
-        try:
-            return self.apps_v1_api.create_namespaced_deployment(
-                body=self._deployment(),
-                namespace=self.namespace,
-                pretty=self.pretty
-            )
-        except kubernetes.client.rest.ApiException as e:
-            print(e)
+    def _create_deployment(self, **kwargs):
+        return self.apps_v1_api.create_namespaced_deployment(
+            body=self._deployment(),
+            namespace=self.namespace,
+            pretty=self.pretty,
+            **kwargs
+        )
 
-    def _patch_deployment(self):
-        try:
-            return self.apps_v1_api.patch_namespaced_deployment(
-                name=self.name,
-                body=self._deployment(),
-                namespace=self.namespace,
-                pretty=self.pretty
-            )
-        except kubernetes.client.rest.ApiException as e:
-            print(e)
+    def _patch_deployment(self, **kwargs):
+        return self.apps_v1_api.patch_namespaced_deployment(
+            name=self.name,
+            body=self._deployment(),
+            namespace=self.namespace,
+            pretty=self.pretty,
+            **kwargs
+        )
 
-    def _delete_deployment(self):
-        try:
-            return self.apps_v1_api.delete_namespaced_deployment(
-                name=self.name,
-                namespace=self.namespace
-            )
-        except kubernetes.client.rest.ApiException as e:
-            print(e)
+    def _delete_deployment(self, **kwargs):
+        return self.apps_v1_api.delete_namespaced_deployment(
+            name=self.name,
+            namespace=self.namespace,
+            **kwargs
+        )
 
-    def _create_service_account(self):
-        try:
-            return self.core_v1_api.create_namespaced_service_account(
-                namespace=self.namespace,
-                body=self._service_account(),
-                pretty=self.pretty
-            )
-        except kubernetes.client.rest.ApiException as e:
-            print(e)
+    def _create_service_account(self, **kwargs):
+        return self.core_v1_api.create_namespaced_service_account(
+            namespace=self.namespace,
+            body=self._service_account(),
+            pretty=self.pretty,
+            **kwargs
+        )
 
-    def _patch_service_account(self):
-        try:
-            return self.core_v1_api.patch_namespaced_service_account(
-                name=self.name,
-                namespace=self.namespace,
-                body=self._service_account(),
-                pretty=self.pretty
-            )
-        except kubernetes.client.rest.ApiException as e:
-            print(e)
+    def _patch_service_account(self, **kwargs):
+        return self.core_v1_api.patch_namespaced_service_account(
+            name=self.name,
+            namespace=self.namespace,
+            body=self._service_account(),
+            pretty=self.pretty,
+            **kwargs
+        )
 
-    def _delete_service_account(self):
-        try:
-            return self.core_v1_api.delete_namespaced_service_account(
-                name=self.name,
-                namespace=self.namespace
-            )
-        except kubernetes.client.rest.ApiException as e:
-            print(e)
+    def _delete_service_account(self, **kwargs):
+        return self.core_v1_api.delete_namespaced_service_account(
+            name=self.name,
+            namespace=self.namespace,
+            **kwargs
+        )
 
-    def _create_cluster_role(self):
-        try:
-            return self.rbac_v1_api.create_cluster_role(
-                body=self._cluster_role()
-            )
-        except kubernetes.client.rest.ApiException as e:
-            print(e)
+    def _create_cluster_role(self, **kwargs):
+        return self.rbac_v1_api.create_cluster_role(
+            body=self._cluster_role(),
+            **kwargs
+        )
 
-    def _patch_cluster_role(self):
-        try:
-            return self.rbac_v1_api.patch_cluster_role(
-                name=self.name,
-                body=self._cluster_role(),
-                pretty=self.pretty
-            )
-        except kubernetes.client.rest.ApiException as e:
-            print(e)
+    def _patch_cluster_role(self, **kwargs):
+        return self.rbac_v1_api.patch_cluster_role(
+            name=self.name,
+            body=self._cluster_role(),
+            pretty=self.pretty,
+            **kwargs
+        )
 
-    def _delete_cluster_role(self):
-        try:
-            return self.rbac_v1_api.delete_cluster_role(
-                name=self.name
-            )
-        except kubernetes.client.rest.ApiException as e:
-            print(e)
+    def _delete_cluster_role(self, **kwargs):
+        return self.rbac_v1_api.delete_cluster_role(
+            name=self.name,
+            **kwargs
+        )
 
-    def _create_cluster_role_binding(self):
-        try:
-            return self.rbac_v1_api.create_cluster_role_binding(
-                body=self._cluster_role_binding()
-            )
-        except kubernetes.client.rest.ApiException as e:
-            print(e)
+    def _create_cluster_role_binding(self, **kwargs):
+        return self.rbac_v1_api.create_cluster_role_binding(
+            body=self._cluster_role_binding(),
+            **kwargs
+        )
 
-    def _patch_cluster_role_binding(self):
-        try:
-            return self.rbac_v1_api.patch_cluster_role_binding(
-                name=self.name,
-                body=self._cluster_role_binding()
-            )
-        except kubernetes.client.rest.ApiException as e:
-            print(e)
+    def _patch_cluster_role_binding(self, **kwargs):
+        return self.rbac_v1_api.patch_cluster_role_binding(
+            name=self.name,
+            body=self._cluster_role_binding(),
+            **kwargs
+        )
 
-    def _delete_cluster_role_binding(self):
-        try:
-            return self.rbac_v1_api.delete_cluster_role_binding(
-                name=self.name,
-            )
-        except kubernetes.client.rest.ApiException as e:
-            print(e)
+    def _delete_cluster_role_binding(self, **kwargs):
+        return self.rbac_v1_api.delete_cluster_role_binding(
+            name=self.name,
+            **kwargs
+        )
 
     def _deployment(self):
         return client.V1Deployment(
@@ -0,0 +1,103 @@
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+
+
+class ExpiringCache(object):
+    """
+    Thread safe cache of values which expire at a known point in time.
+
+    Entries can optionally be persisted to a json file (for example in
+    /tmp) so that warm lambda containers and short lived processes can
+    reuse them.
+    """
+    def __init__(self, cache_filepath=None):
+        self._cache_filepath = cache_filepath
+        self._entries = {}
+        self._loaded = cache_filepath is None
+        self._lock = threading.Lock()
+
+    def get(self, key, margin=0):
+        """
+        Return the cached value for key, or None if it is missing or
+        expires within margin seconds
+        """
+        with self._lock:
+            self._load()
+            entry = self._entries.get(self._key(key))
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at - margin <= time.time():
+            return None
+        return value
+
+    def set(self, key, value, expires_at):
+        """
+        Cache value for key until the epoch time expires_at
+        """
+        with self._lock:
+            self._load()
+            self._entries[self._key(key)] = (value, expires_at)
+            self._save()
+
+    def invalidate(self, key):
+        """
+        Remove key from the cache
+        """
+        with self._lock:
+            self._load()
+            if self._entries.pop(self._key(key), None) is not None:
+                self._save()
+
+    def clear(self):
+        """
+        Remove every entry from the cache
+        """
+        with self._lock:
+            self._entries = {}
+            self._loaded = True
+            self._save()
+
+    @staticmethod
+    def _key(key):
+        if isinstance(key, (tuple, list)):
+            return '|'.join('' if part is None else str(part) for part in key)
+        return str(key)
+
+    def _load(self):
+        if self._loaded:
+            return
+        self._loaded = True
+        try:
+            with open(self._cache_filepath) as infile:
+                entries = json.load(infile)
+        except (OSError, ValueError):
+            return
+        now = time.time()
+        for key, (value, expires_at) in entries.items():
+            if expires_at > now:
+                self._entries.setdefault(key, (value, expires_at))
+
+    def _save(self):
+        if self._cache_filepath is None:
+            return
+        now = time.time()
+        entries = {
+            key: entry for key, entry in self._entries.items()
+            if entry[1] > now
+        }
+        try:
+            # a unique file, created readable by the owner only
+            with tempfile.NamedTemporaryFile('w',
+                                             dir=os.path.dirname(self._cache_filepath) or '.',
+                                             prefix=os.path.basename(self._cache_filepath),
+                                             suffix='.tmp',
+                                             delete=False) as outfile:
+                json.dump(entries, outfile)
+            os.replace(outfile.name, self._cache_filepath)
+        except OSError as e:
+            logging.warning(f'could not persist cache {e}')
@@ -1,48 +1,218 @@
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import requests
 import json
+import logging
+import threading
 
 SUCCESS = "SUCCESS"
 FAILED = "FAILED"
 
+CONNECT_TIMEOUT_SECS = 5
+READ_TIMEOUT_SECS = 15
+RETRIES = 4
+RETRY_BACKOFF_FACTOR = 0.5
+RETRY_STATUSES = (500, 502, 503, 504)
+MAX_RESPONSE_BYTES = 4096
+# time the handler needs to return after the response is sent
+RETURN_MARGIN_SECS = 0.5
+MIN_SEND_SECS = 1
 
-def send(event,
-         context,
-         responseStatus,
-         responseData,
-         physicalResourceId=None,
-         noEcho=False):
+_sessions = {}
+_session_lock = threading.Lock()
 
-    responseUrl = event['ResponseURL']
 
-    print(responseUrl)
+def get_session(retries=RETRIES):
+    """
+    Return the requests session shared by every response with the same
+    number of retries, which keeps the connection to S3 open between
+    invocations and retries connection errors and 5xx responses with
+    exponential backoff
+    """
+    with _session_lock:
+        session = _sessions.get(retries)
+        if session is None:
+            retry = Retry(
+                total=retries,
+                backoff_factor=RETRY_BACKOFF_FACTOR,
+                status_forcelist=RETRY_STATUSES,
+                raise_on_status=False,
+            )
+            session = requests.Session()
+            session.mount('https://', HTTPAdapter(max_retries=retry))
+            session.mount('http://', HTTPAdapter(max_retries=retry))
+            _sessions[retries] = session
+        return session
+
+
+def max_send_secs(retries=RETRIES,
+                  timeout=(CONNECT_TIMEOUT_SECS, READ_TIMEOUT_SECS),
+                  backoff_factor=RETRY_BACKOFF_FACTOR):
+    """
+    Return the longest send can take, when every attempt times out,
+    including the backoff sleeps between the retries
+    """
+    attempts = retries + 1
+    backoff = sum(backoff_factor * 2 ** (retry - 1) for retry in range(2, attempts))
+    return attempts * sum(timeout) + backoff
+
+
+def send_settings(context):
+    """
+    Return the retries and the (connect, read) timeout of a send which
+    fits the remaining time of a lambda context, dropping retries before
+    shortening the timeout
+    """
+    timeout = (CONNECT_TIMEOUT_SECS, READ_TIMEOUT_SECS)
+    if not hasattr(context, 'get_remaining_time_in_millis'):
+        return RETRIES, timeout
+    remaining = context.get_remaining_time_in_millis() / 1000 - RETURN_MARGIN_SECS
+    for retries in range(RETRIES, -1, -1):
+        if max_send_secs(retries, timeout) <= remaining:
+            return retries, timeout
+    scale = max(remaining, MIN_SEND_SECS) / sum(timeout)
+    return 0, (CONNECT_TIMEOUT_SECS * scale, READ_TIMEOUT_SECS * scale)
+
+
+def response_body(event,
+                  context,
+                  responseStatus,
+                  responseData,
+                  physicalResourceId=None,
+                  noEcho=False):
+    """
+    Return the json response body, dropping the largest Data values until
+    it fits the CloudFormation response size limit
+    """
+    log_stream_name = getattr(context, 'log_stream_name', None)
 
     responseBody = {}
     responseBody['Status'] = responseStatus
     responseBody['Reason'] = (
-        f'See the details in CloudWatch Log Stream: {context.log_stream_name}'
+        f'See the details in CloudWatch Log Stream: {log_stream_name}'
     )
 
     responseBody[
-        'PhysicalResourceId'] = physicalResourceId or context.log_stream_name
+        'PhysicalResourceId'] = physicalResourceId or log_stream_name
     responseBody['StackId'] = event['StackId']
     responseBody['RequestId'] = event['RequestId']
     responseBody['LogicalResourceId'] = event['LogicalResourceId']
     responseBody['NoEcho'] = noEcho
-    responseBody['Data'] = responseData
+    responseBody['Data'] = dict(responseData or {})
 
     json_responseBody = json.dumps(responseBody)
+    if len(json_responseBody.encode('utf-8')) <= MAX_RESPONSE_BYTES:
+        return json_responseBody
+
+    data = responseBody['Data']
+    sizes = {key: len(json.dumps(value)) for key, value in data.items()}
+    for key in sorted(sizes, key=sizes.get, reverse=True):
+        del data[key]
+        json_responseBody = json.dumps(responseBody)
+        if len(json_responseBody.encode('utf-8')) <= MAX_RESPONSE_BYTES:
+            break
+    logging.warning(f'response Data trimmed to {sorted(data)} to fit {MAX_RESPONSE_BYTES} bytes')
+    return json_responseBody
+
+
+def send(event,
+         context,
+         responseStatus,
+         responseData,
+         physicalResourceId=None,
+         noEcho=False,
+         timeout=None):
+    """
+    Put the response to the presigned ResponseURL, returning True if
+    CloudFormation accepted it. The retries and, unless timeout is given,
+    the timeout are chosen to fit the time the lambda context has left.
+    """
+    retries, settings_timeout = send_settings(context)
+    timeout = timeout or settings_timeout
+    responseUrl = event['ResponseURL']
+
+    print(responseUrl)
+
+    json_responseBody = response_body(
+        event,
+        context,
+        responseStatus,
+        responseData,
+        physicalResourceId=physicalResourceId,
+        noEcho=noEcho,
+    )
 
     print("Response body:\n" + json_responseBody)
 
     headers = {
         'content-type': '',
-        'content-length': str(len(json_responseBody))
+        'content-length': str(len(json_responseBody.encode('utf-8')))
     }
 
     try:
-        response = requests.put(responseUrl,
-                                data=json_responseBody,
-                                headers=headers)
+        response = get_session(retries).put(responseUrl,
+                                            data=json_responseBody,
+                                            headers=headers,
+                                            timeout=timeout)
         print("Status code: " + response.reason)
+        if not response.ok:
+            logging.error(f'response was rejected {response.status_code} {response.text}')
+        return response.ok
     except Exception as e:
-        print("send(..) failed executing requests.put(..): " + str(e))
+        logging.error(f'send(..) failed executing requests.put(..): {e}')
+        return False
+
+
+class Responder(object):
+    """
+    Send the response to one request at most once, so a handler can
+    respond as soon as the outcome is known, before cleaning up, or from
+    a background thread while it carries on. Later calls to send are
+    ignored, and wait() joins a background send, which should finish
+    before the handler returns because lambda freezes the container.
+    """
+    def __init__(self, event, context):
+        self.event = event
+        self.context = context
+        self.sent = False
+        self.accepted = None
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def send(self,
+             responseStatus,
+             responseData=None,
+             physicalResourceId=None,
+             noEcho=False,
+             background=False):
+        with self._lock:
+            if self.sent:
+                logging.info(f'response already sent, ignoring {responseStatus}')
+                return False
+            self.sent = True
+
+        def put():
+            self.accepted = send(
+                self.event,
+                self.context,
+                responseStatus,
+                responseData,
+                physicalResourceId=physicalResourceId,
+                noEcho=noEcho,
+            )
+
+        if background:
+            self._thread = threading.Thread(target=put, name='cfn-response')
+            self._thread.start()
+            return True
+        put()
+        return self.accepted
+
+    def wait(self, timeout=None):
+        """
+        Wait for a background send to finish, returning True if
+        CloudFormation accepted the response
+        """
+        if self._thread is not None:
+            self._thread.join(timeout)
+        return self.accepted
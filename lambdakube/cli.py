@@ -0,0 +1,120 @@
+"""Command line interface for lambdakube
+
+    lambdakube token --cluster-name NAME [--region REGION] [--role-arn ARN]
+
+prints a client.authentication.k8s.io ExecCredential for use as a kubectl
+exec credential plugin. Tokens are cached on disk per cluster, and a cache
+hit does not import botocore or kubernetes.
+"""
+from lambdakube.cache import ExpiringCache
+from lambdakube.token_generator import TOKEN_REFRESH_MARGIN_SECS, get_expiration
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+
+EXEC_CREDENTIAL_API_VERSION = 'client.authentication.k8s.io/v1beta1'
+CACHE_DIR = os.path.join('~', '.kube', 'cache', 'lambdakube')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='lambdakube')
+    subparsers = parser.add_subparsers(dest='command')
+    subparsers.required = True
+
+    token_parser = subparsers.add_parser(
+        'token', help='print an ExecCredential for an EKS cluster')
+    token_parser.add_argument('--cluster-name', required=True)
+    token_parser.add_argument(
+        '--region',
+        default=os.environ.get('AWS_REGION', os.environ.get('AWS_DEFAULT_REGION')))
+    token_parser.add_argument('--role-arn')
+    token_parser.add_argument('--cache-dir', default=CACHE_DIR)
+    token_parser.add_argument('--no-cache', action='store_true')
+    token_parser.add_argument('--api-version', default=EXEC_CREDENTIAL_API_VERSION)
+    token_parser.set_defaults(func=token)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+def token(args):
+    try:
+        credential = get_exec_credential(
+            args.cluster_name,
+            region=args.region,
+            role_arn=args.role_arn,
+            cache_dir=None if args.no_cache else args.cache_dir,
+            api_version=args.api_version,
+        )
+    except Exception as e:
+        sys.stderr.write(f'could not get token {e}\n')
+        return 1
+    sys.stdout.write(json.dumps(credential) + '\n')
+    return 0
+
+
+def get_exec_credential(cluster_name,
+                        region=None,
+                        role_arn=None,
+                        cache_dir=CACHE_DIR,
+                        api_version=EXEC_CREDENTIAL_API_VERSION):
+    """
+    Return an ExecCredential dict for cluster_name, reusing a token
+    cached in cache_dir for the same AWS profile and access key until
+    shortly before it expires
+    """
+    key = (cluster_name, region, role_arn, _caller_identity())
+    token_cache = ExpiringCache(_cache_filepath(cache_dir, key) if cache_dir else None)
+    cached = token_cache.get(key, margin=TOKEN_REFRESH_MARGIN_SECS)
+    if cached is None:
+        expires_at = get_expiration()
+        cached = (_generate_token(cluster_name, region, role_arn), expires_at)
+        token_cache.set(key, cached, expires_at)
+    token, expires_at = cached
+
+    return {
+        'kind': 'ExecCredential',
+        'apiVersion': api_version,
+        'spec': {},
+        'status': {
+            'expirationTimestamp': time.strftime(
+                '%Y-%m-%dT%H:%M:%SZ', time.gmtime(expires_at)),
+            'token': token,
+        }
+    }
+
+
+def _generate_token(cluster_name, region, role_arn):
+    # imported here so that cache hits never load botocore
+    from lambdakube.session import get_session
+    from lambdakube.sts_client_factory import STSClientFactory
+    from lambdakube.token_generator import TokenGenerator
+
+    presigner = STSClientFactory(get_session()).get_presigner(
+        region_name=region,
+        role_arn=role_arn)
+    return TokenGenerator(presigner).get_token(cluster_name)
+
+
+def _caller_identity():
+    # the profile and access key the token is signed with, read from the
+    # environment so that cache hits still do not load botocore
+    identity = '|'.join([
+        os.environ.get('AWS_PROFILE', os.environ.get('AWS_DEFAULT_PROFILE', '')),
+        os.environ.get('AWS_ACCESS_KEY_ID', ''),
+    ])
+    return hashlib.sha256(identity.encode('utf-8')).hexdigest()[:16]
+
+
+def _cache_filepath(cache_dir, key):
+    cache_dir = os.path.expanduser(cache_dir)
+    os.makedirs(cache_dir, mode=0o700, exist_ok=True)
+    digest = hashlib.sha256(repr(key).encode('utf-8')).hexdigest()
+    return os.path.join(cache_dir, f'{key[0]}-{digest[:16]}.json')
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,87 @@
+from collections import OrderedDict
+import hashlib
+import threading
+
+MAX_CLIENTS = 32
+
+
+class ClientPool(object):
+    """
+    Thread safe pool of botocore clients keyed by service, region and
+    credentials identity.
+
+    Creating a botocore client loads and parses the service model, so
+    clients are built once and shared by every caller using the same
+    credentials. The least recently used client is dropped once the pool
+    holds max_clients clients.
+    """
+    def __init__(self, max_clients=MAX_CLIENTS):
+        self._max_clients = max_clients
+        self._clients = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_client(self,
+                   session,
+                   service_name,
+                   region_name=None,
+                   aws_access_key_id=None,
+                   aws_secret_access_key=None,
+                   aws_session_token=None,
+                   on_create=None):
+        """
+        Return a pooled client, creating it and calling on_create(client)
+        the first time it is requested
+        """
+        key = (
+            service_name,
+            region_name,
+            self._identity(session, aws_access_key_id, aws_session_token)
+        )
+        with self._lock:
+            entry = self._clients.get(key)
+            if entry is None:
+                client = session.create_client(
+                    service_name,
+                    region_name=region_name,
+                    aws_access_key_id=aws_access_key_id,
+                    aws_secret_access_key=aws_secret_access_key,
+                    aws_session_token=aws_session_token,
+                )
+                if on_create is not None:
+                    on_create(client)
+                # keep a reference to the session so its id is not reused
+                entry = (client, session)
+                self._clients[key] = entry
+                while len(self._clients) > self._max_clients:
+                    self._clients.popitem(last=False)
+            else:
+                self._clients.move_to_end(key)
+            return entry[0]
+
+    def close_connections(self):
+        """
+        Close the connections of every pooled client, keeping the clients,
+        which open new connections on their next request
+        """
+        with self._lock:
+            clients = [entry[0] for entry in self._clients.values()]
+        for client in clients:
+            client.close()
+
+    def clear(self):
+        """
+        Drop every pooled client
+        """
+        with self._lock:
+            self._clients.clear()
+
+    @staticmethod
+    def _identity(session, aws_access_key_id, aws_session_token):
+        if aws_access_key_id is None:
+            return ('session', id(session))
+        token_hash = hashlib.sha256(
+            (aws_session_token or '').encode('utf-8')).hexdigest()
+        return (aws_access_key_id, token_hash)
+
+
+default_client_pool = ClientPool()
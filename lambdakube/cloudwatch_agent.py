@@ -1,12 +1,12 @@
+from lambdakube.component import Component
 from lambdakube.lambda_kube import metadata
 import kubernetes.client as client
-import kubernetes.client.rest
 import json
 
 IMAGE = 'amazon/cloudwatch-agent:1.245315.0'
 
 
-class CloudWatchAgent(object):
+class CloudWatchAgent(Component):
     def __init__(self,
                  name='cloudwatch-agent',
                  namespace='amazon-cloudwatch',
@@ -27,76 +27,54 @@ class CloudWatchAgent(object):
 
     @property
     def apps_v1_api(self):
-        return client.AppsV1Api(self.configuration)
+        return self._api(client.AppsV1Api)
 
     @property
     def core_v1_api(self):
-        return client.CoreV1Api(self.configuration)
+        return self._api(client.CoreV1Api)
 
     @property
     def rbac_v1_api(self):
-        return client.RbacAuthorizationV1beta1Api(self.configuration)
+        return self._api(client.RbacAuthorizationV1beta1Api)
 
     @property
     def labels(self):
         return dict({'name': self.name})
 
-    def create(self):
+    def resources(self):
         return [
-            self._create_namespace(),
-            self._create_daemonset(),
-            self._create_configmap(),
-            self._create_service_account(),
-            self._create_cluster_role(),
-            self._create_cluster_role_binding(),
+            self._resource('namespace', self._namespace),
+            self._resource('service_account', self._service_account,
+                           depends_on=['namespace']),
+            self._resource('cluster_role', self._cluster_role),
+            self._resource('configmap', self._configmap,
+                           depends_on=['namespace']),
+            self._resource('cluster_role_binding', self._cluster_role_binding,
+                           depends_on=['service_account', 'cluster_role']),
+            self._resource('daemonset', self._daemon_set,
+                           depends_on=['configmap', 'cluster_role_binding']),
         ]
 
-    def patch(self):
-        return [
-            self._patch_namespace(),
-            self._patch_daemonset(),
-            self._patch_configmap(),
-            self._patch_service_account(),
-            self._patch_cluster_role(),
-            self._patch_cluster_role_binding(),
-        ]
-
-    def delete(self):
-        return [
-            self._delete_namespace(),
-            self._delete_daemonset(),
-            self._delete_configmap(),
-            self._delete_service_account(),
-            self._delete_cluster_role(),
-            self._delete_cluster_role_binding(),
-        ]
+    def _create_namespace(self, **kwargs):
+        return self.core_v1_api.create_namespace(
+            body=self._namespace(),
+            pretty=self.pretty,
+            **kwargs
+        )
 
-    def _create_namespace(self):
-        try:
-            return self.core_v1_api.create_namespace(
-                body=self._namespace(),
-                pretty=self.pretty,
-            )
-        except kubernetes.client.rest.ApiException as e:
-            print(e)
-
-    def _patch_namespace(self):
-        try:
-            return self.core_v1_api.patch_namespace(
-                name=self.namespace,
-                body=self._namespace(),
-                pretty=self.pretty,
-            )
-        except kubernetes.client.rest.ApiException as e:
-            print(e)
+    def _patch_namespace(self, **kwargs):
+        return self.core_v1_api.patch_namespace(
+            name=self.namespace,
+            body=self._namespace(),
+            pretty=self.pretty,
+            **kwargs
+        )
 
-    def _delete_namespace(self):
-        try:
-            return self.core_v1_api.delete_namespace(
-                name=self.namespace,
-            )
-        except kubernetes.client.rest.ApiException as e:
-            print(e)
+    def _delete_namespace(self, **kwargs):
+        return self.core_v1_api.delete_namespace(
+            name=self.namespace,
+            **kwargs
+        )
 
     def _namespace(self):
         return client.V1Namespace(
@@ -108,34 +86,28 @@ class CloudWatchAgent(object):
                 )
             )
 
-    def _create_daemonset(self):
-        try:
-            return self.apps_v1_api.create_namespaced_daemon_set(
-                namespace=self.namespace,
-                body=self._daemon_set()
-            )
-        except kubernetes.client.rest.ApiException as e:
-            print(e)
+    def _create_daemonset(self, **kwargs):
+        return self.apps_v1_api.create_namespaced_daemon_set(
+            namespace=self.namespace,
+            body=self._daemon_set(),
+            **kwargs
+        )
 
-    def _patch_daemonset(self):
-        try:
-            return self.apps_v1_api.patch_namespaced_daemon_set(
-                name=self.name,
-                namespace=self.namespace,
-                body=self._daemon_set()
-            )
-        except kubernetes.client.rest.ApiException as e:
-            print(e)
+    def _patch_daemonset(self, **kwargs):
+        return self.apps_v1_api.patch_namespaced_daemon_set(
+            name=self.name,
+            namespace=self.namespace,
+            body=self._daemon_set(),
+            **kwargs
+        )
 
-    def _delete_daemonset(self):
-        try:
-            return self.apps_v1_api.patch_namespaced_daemon_set(
-                name=self.name,
-                namespace=self.namespace,
-                body=self._daemon_set()
-            )
-        except kubernetes.client.rest.ApiException as e:
-            print(e)
+    def _delete_daemonset(self, **kwargs):
+        return self.apps_v1_api.patch_namespaced_daemon_set(
+            name=self.name,
+            namespace=self.namespace,
+            body=self._daemon_set(),
+            **kwargs
+        )
 
     def _daemon_set(self):
         return client.V1DaemonSet(
@@ -262,35 +234,29 @@ class CloudWatchAgent(object):
             )
         )
 
-    def _create_configmap(self):
-        try:
-            return self.core_v1_api.create_namespaced_config_map(
-                namespace=self.namespace,
-                body=self._configmap(),
-                pretty=self.pretty,
-            )
-        except kubernetes.client.rest.ApiException as e:
-            print(e)
+    def _create_configmap(self, **kwargs):
+        return self.core_v1_api.create_namespaced_config_map(
+            namespace=self.namespace,
+            body=self._configmap(),
+            pretty=self.pretty,
+            **kwargs
+        )
 
-    def _patch_configmap(self, name='cwagentconfig'):
-        try:
-            return self.core_v1_api.patch_namespaced_config_map(
-                name=name,
-                namespace=self.namespace,
-                body=self._configmap(),
-                pretty=self.pretty,
-            )
-        except kubernetes.client.rest.ApiException as e:
-            print(e)
+    def _patch_configmap(self, name='cwagentconfig', **kwargs):
+        return self.core_v1_api.patch_namespaced_config_map(
+            name=name,
+            namespace=self.namespace,
+            body=self._configmap(),
+            pretty=self.pretty,
+            **kwargs
+        )
 
-    def _delete_configmap(self, name='cwagentconfig'):
-        try:
-            return self.core_v1_api.delete_namespaced_config_map(
-                name=name,
-                namespace=self.namespace
-            )
-        except kubernetes.client.rest.ApiException as e:
-            print(e)
+    def _delete_configmap(self, name='cwagentconfig', **kwargs):
+        return self.core_v1_api.delete_namespaced_config_map(
+            name=name,
+            namespace=self.namespace,
+            **kwargs
+        )
 
     def _configmap(self):
         return client.V1ConfigMap(
@@ -320,35 +286,29 @@ class CloudWatchAgent(object):
             })
         )
 
-    def _create_service_account(self):
-        try:
-            return self.core_v1_api.create_namespaced_service_account(
-                namespace=self.namespace,
-                body=self._service_account(),
-                pretty=self.pretty
-            )
-        except kubernetes.client.rest.ApiException as e:
-            print(e)
+    def _create_service_account(self, **kwargs):
+        return self.core_v1_api.create_namespaced_service_account(
+            namespace=self.namespace,
+            body=self._service_account(),
+            pretty=self.pretty,
+            **kwargs
+        )
 
-    def _patch_service_account(self):
-        try:
-            return self.core_v1_api.patch_namespaced_service_account(
-                name=self.name,
-                namespace=self.namespace,
-                body=self._service_account(),
-                pretty=self.pretty
-            )
-        except kubernetes.client.rest.ApiException as e:
-            print(e)
+    def _patch_service_account(self, **kwargs):
+        return self.core_v1_api.patch_namespaced_service_account(
+            name=self.name,
+            namespace=self.namespace,
+            body=self._service_account(),
+            pretty=self.pretty,
+            **kwargs
+        )
 
-    def _delete_service_account(self):
-        try:
-            return self.core_v1_api.delete_namespaced_service_account(
-                name=self.name,
-                namespace=self.namespace
-            )
-        except kubernetes.client.rest.ApiException as e:
-            print(e)
+    def _delete_service_account(self, **kwargs):
+        return self.core_v1_api.delete_namespaced_service_account(
+            name=self.name,
+            namespace=self.namespace,
+            **kwargs
+        )
 
     def _service_account(self):
         return client.V1ServiceAccount(
@@ -360,31 +320,25 @@ class CloudWatchAgent(object):
             )
         )
 
-    def _create_cluster_role(self):
-        try:
-            return self.rbac_v1_api.create_cluster_role(
-                body=self._cluster_role()
-            )
-        except kubernetes.client.rest.ApiException as e:
-            print(e)
+    def _create_cluster_role(self, **kwargs):
+        return self.rbac_v1_api.create_cluster_role(
+            body=self._cluster_role(),
+            **kwargs
+        )
 
-    def _patch_cluster_role(self):
-        try:
-            return self.rbac_v1_api.patch_cluster_role(
-                name=f'{self.name}-role',
-                body=self._cluster_role(),
-                pretty=self.pretty
-            )
-        except kubernetes.client.rest.ApiException as e:
-            print(e)
+    def _patch_cluster_role(self, **kwargs):
+        return self.rbac_v1_api.patch_cluster_role(
+            name=f'{self.name}-role',
+            body=self._cluster_role(),
+            pretty=self.pretty,
+            **kwargs
+        )
 
-    def _delete_cluster_role(self):
-        try:
-            return self.rbac_v1_api.delete_cluster_role(
-                name=self.name
-            )
-        except kubernetes.client.rest.ApiException as e:
-            print(e)
+    def _delete_cluster_role(self, **kwargs):
+        return self.rbac_v1_api.delete_cluster_role(
+            name=self.name,
+            **kwargs
+        )
 
     def _cluster_role(self):
         return client.V1ClusterRole(
@@ -432,30 +386,24 @@ class CloudWatchAgent(object):
             ]
         )
 
-    def _create_cluster_role_binding(self):
-        try:
-            return self.rbac_v1_api.create_cluster_role_binding(
-                body=self._cluster_role_binding()
-            )
-        except kubernetes.client.rest.ApiException as e:
-            print(e)
+    def _create_cluster_role_binding(self, **kwargs):
+        return self.rbac_v1_api.create_cluster_role_binding(
+            body=self._cluster_role_binding(),
+            **kwargs
+        )
 
-    def _patch_cluster_role_binding(self):
-        try:
-            return self.rbac_v1_api.patch_cluster_role_binding(
-                name=f'{self.name}-role-binding',
-                body=self._cluster_role_binding()
-            )
-        except kubernetes.client.rest.ApiException as e:
-            print(e)
+    def _patch_cluster_role_binding(self, **kwargs):
+        return self.rbac_v1_api.patch_cluster_role_binding(
+            name=f'{self.name}-role-binding',
+            body=self._cluster_role_binding(),
+            **kwargs
+        )
 
-    def _delete_cluster_role_binding(self):
-        try:
-            return self.rbac_v1_api.delete_cluster_role_binding(
-                name=self.name,
-            )
-        except kubernetes.client.rest.ApiException as e:
-            print(e)
+    def _delete_cluster_role_binding(self, **kwargs):
+        return self.rbac_v1_api.delete_cluster_role_binding(
+            name=self.name,
+            **kwargs
+        )
 
     def _cluster_role_binding(self):
         return client.V1ClusterRoleBinding(
@@ -0,0 +1,407 @@
+from lambdakube.deadline import MIN_REQUEST_TIMEOUT_SECS, as_deadline
+from lambdakube.exceptions import DeadlineExceeded
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+import abc
+import hashlib
+import json
+import kubernetes.client as client
+import kubernetes.client.rest
+import logging
+import threading
+import time
+import urllib3.exceptions
+
+MAX_WORKERS = 4
+FIELD_MANAGER = 'lambdakube'
+APPLY_PATCH_CONTENT_TYPE = 'application/apply-patch+yaml'
+
+Resource = namedtuple(
+    'Resource',
+    ['name', 'body', 'create', 'patch', 'delete', 'depends_on', 'server_side_apply'],
+    defaults=[None])
+
+_default_api_client = None
+_api_clients_lock = threading.Lock()
+
+
+def shared_api_client(configuration=None):
+    """
+    Return the ApiClient for configuration, which may be an ApiClient, a
+    Configuration or None for the default configuration. Components given
+    the same configuration share one ApiClient, and so one connection pool.
+    """
+    global _default_api_client
+    if isinstance(configuration, client.ApiClient):
+        return configuration
+    with _api_clients_lock:
+        if configuration is None:
+            if _default_api_client is None:
+                _default_api_client = client.ApiClient()
+            return _default_api_client
+        # kept on the configuration so both are collected together
+        api_client = getattr(configuration, '_lambdakube_api_client', None)
+        if api_client is None:
+            api_client = client.ApiClient(configuration)
+            configuration._lambdakube_api_client = api_client
+        return api_client
+
+
+def clear_api_clients():
+    """
+    Forget the shared default ApiClient, for example after the default
+    configuration changed
+    """
+    global _default_api_client
+    with _api_clients_lock:
+        _default_api_client = None
+
+
+def resource_path(body):
+    """
+    Return the api path of a serialized resource body, derived from its
+    apiVersion, kind, namespace and name
+    """
+    api_version = body['apiVersion']
+    prefix = '/api' if '/' not in api_version else '/apis'
+    kind = body['kind'].lower()
+    if kind.endswith(('s', 'x', 'ch', 'sh')):
+        plural = kind + 'es'
+    elif kind.endswith('y') and kind[-2:-1] not in 'aeiou':
+        plural = kind[:-1] + 'ies'
+    else:
+        plural = kind + 's'
+    metadata = body['metadata']
+    namespace = metadata.get('namespace')
+    scope = f'/namespaces/{namespace}' if namespace else ''
+    return f'{prefix}/{api_version}{scope}/{plural}/{metadata["name"]}'
+
+
+def apply_conflicts(error):
+    """
+    Return the fields of a server side apply conflict error, each with
+    the message naming the manager which owns it
+    """
+    try:
+        causes = json.loads(error.body)['details']['causes']
+    except (AttributeError, KeyError, TypeError, ValueError):
+        return []
+    return [(cause.get('field'), cause.get('message')) for cause in causes]
+
+
+def server_side_apply(api_client, body, field_manager=FIELD_MANAGER, force=False,
+                      _request_timeout=None):
+    """
+    Apply body with a single server side apply request, which creates or
+    updates the object and only sets the fields in body, owned by
+    field_manager. With force, fields owned by other managers are taken
+    over instead of reported as conflicts.
+    """
+    body = api_client.sanitize_for_serialization(body)
+    query_params = [('fieldManager', field_manager)]
+    if force:
+        query_params.append(('force', 'true'))
+    try:
+        return api_client.call_api(
+            resource_path(body),
+            'PATCH',
+            query_params=query_params,
+            header_params={
+                'Accept': 'application/json',
+                'Content-Type': APPLY_PATCH_CONTENT_TYPE,
+            },
+            # json is yaml, and a str body is sent as it is
+            body=json.dumps(body),
+            response_type='object',
+            auth_settings=['BearerToken'],
+            _return_http_data_only=True,
+            _request_timeout=_request_timeout,
+        )
+    except kubernetes.client.rest.ApiException as e:
+        if e.status == 409:
+            for field, message in apply_conflicts(e):
+                logging.error(f'{body["kind"]} {body["metadata"]["name"]} {field} {message}')
+        raise
+
+
+def dependency_levels(resources, reverse=False):
+    """
+    Group resources into levels, each resource coming after every
+    resource it depends on. Dependencies on resources which are not in
+    resources are ignored. With reverse the levels are reversed, so that
+    dependents come first, as they must when deleting.
+    """
+    resources_by_name = {resource.name: resource for resource in resources}
+    depths = {}
+
+    def depth(resource, visiting=()):
+        if resource.name in visiting:
+            raise ValueError(f'dependency cycle through {resource.name}')
+        if resource.name not in depths:
+            depths[resource.name] = 1 + max([
+                depth(resources_by_name[name], visiting + (resource.name,))
+                for name in resource.depends_on if name in resources_by_name
+            ], default=-1)
+        return depths[resource.name]
+
+    levels = []
+    for resource in resources:
+        level = depth(resource)
+        while len(levels) <= level:
+            levels.append([])
+        levels[level].append(resource)
+    if reverse:
+        levels.reverse()
+    return levels
+
+
+def _apply_operation(resource, prefer):
+    if prefer == 'create':
+        first, fallback, fallback_status = resource.create, resource.patch, 409
+    else:
+        first, fallback, fallback_status = resource.patch, resource.create, 404
+
+    def apply(**kwargs):
+        try:
+            return first(**kwargs)
+        except kubernetes.client.rest.ApiException as e:
+            if e.status != fallback_status:
+                raise
+        return fallback(**kwargs)
+    return apply
+
+
+def _timed(operation, **kwargs):
+    started = time.monotonic()
+    try:
+        return operation(**kwargs), None, time.monotonic() - started
+    except (kubernetes.client.rest.ApiException,
+            urllib3.exceptions.HTTPError) as e:
+        return None, e, time.monotonic() - started
+
+
+class OperationResult(list):
+    """
+    Responses of the operations which ran, in order, with a report of
+    which operations completed, failed, or were skipped because the
+    deadline was reached. Operations a journal shows were already applied
+    are listed as resumed. timings holds the seconds each operation which
+    ran took, and errors the exception each failed operation raised.
+    """
+    def __init__(self):
+        super(OperationResult, self).__init__()
+        self.completed = []
+        self.failed = []
+        self.skipped = []
+        self.resumed = []
+        self.timings = {}
+        self.errors = {}
+
+    @property
+    def complete(self):
+        return not self.failed and not self.skipped
+
+    def report(self):
+        return {
+            'Completed': self.completed,
+            'Failed': self.failed,
+            'Skipped': self.skipped,
+            'Resumed': self.resumed,
+        }
+
+
+class Component(abc.ABC):
+    """
+    Base class of the components lambdakube installs. Subclasses list
+    the kubernetes resources they manage, and what each depends on, from
+    resources(). Resources which do not depend on each other are applied
+    concurrently, on at most max_workers threads.
+    """
+    max_workers = MAX_WORKERS
+
+    def create(self, deadline=None, journal=None):
+        return self._run_resources('create', self.resources(), deadline, journal)
+
+    def patch(self, deadline=None, journal=None, resources=None):
+        """
+        Patch every resource, or only the resources named in resources
+        """
+        return self._run_resources(
+            'patch',
+            [resource for resource in self.resources()
+             if resources is None or resource.name in resources],
+            deadline, journal)
+
+    def delete(self, deadline=None, journal=None):
+        return self._run_resources(
+            'delete', self.resources(), deadline, journal, reverse=True)
+
+    def apply(self, deadline=None, journal=None, resources=None, prefer='create',
+              server_side=False, force=False):
+        """
+        Create missing resources and patch existing ones, or only the
+        resources named in resources. Each resource is first created, or
+        patched when prefer is 'patch', falling back to the other on a
+        409 or 404, so it takes one request when the guess is right.
+
+        With server_side, each resource is applied with one server side
+        apply request by the lambdakube field manager instead, and force
+        takes over fields owned by other managers.
+        """
+        if prefer not in ('create', 'patch'):
+            raise ValueError(f'prefer must be create or patch, not {prefer}')
+        if server_side:
+            def operation_for(resource):
+                return partial(resource.server_side_apply, force=force)
+        else:
+            def operation_for(resource):
+                return _apply_operation(resource, prefer)
+        return self._run_resources(
+            'apply',
+            [resource for resource in self.resources()
+             if resources is None or resource.name in resources],
+            deadline, journal,
+            operation_for=operation_for)
+
+    @abc.abstractmethod
+    def resources(self):
+        """
+        Return the Resources this component manages
+        """
+
+    def changed_resources(self, other):
+        """
+        Return the names of the resources whose bodies differ between
+        this component and other, which may be None
+        """
+        other_bodies = {} if other is None else {
+            resource.name: resource.body() for resource in other.resources()
+        }
+        return [
+            resource.name for resource in self.resources()
+            if resource.body() != other_bodies.get(resource.name)
+        ]
+
+    def spec_hash(self):
+        """
+        Return a hash of the parameters which determine what this
+        component applies
+        """
+        parameters = {
+            key: value for key, value in vars(self).items()
+            if key != 'configuration' and not key.startswith('_')
+        }
+        content = json.dumps(
+            [type(self).__name__, parameters], sort_keys=True, default=str)
+        return hashlib.sha256(content.encode('utf-8')).hexdigest()[:16]
+
+    def _run(self, operations, deadline=None, journal=None):
+        """
+        Run operations one after another, see _run_levels
+        """
+        return self._run_levels(
+            [[(operation.__name__.lstrip('_'), operation)] for operation in operations],
+            deadline, journal)
+
+    def _run_resources(self, operation, resources, deadline=None, journal=None,
+                       reverse=False, operation_for=None):
+        if operation_for is None:
+            def operation_for(resource):
+                return getattr(resource, operation)
+        return self._run_levels(
+            [[(f'{operation}_{resource.name}', operation_for(resource))
+              for resource in level]
+             for level in dependency_levels(resources, reverse=reverse)],
+            deadline, journal)
+
+    def _run_levels(self, levels, deadline=None, journal=None):
+        """
+        Run levels of named operations in order, the operations of a
+        level concurrently, giving each api request a timeout that fits
+        in the deadline, which may be a Deadline or a lambda context.
+        Operations which no longer fit are skipped. With a journal,
+        operations already applied at the current spec hash are not run
+        again and the ones which succeed are recorded.
+        """
+        deadline = as_deadline(deadline)
+        spec_hash = self.spec_hash() if journal is not None else None
+        if journal is not None:
+            journal.load(**self._journal_kwargs(deadline))
+        result = OperationResult()
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            for level in levels:
+                running = []
+                for name, operation in level:
+                    journal_key = f'{type(self).__name__}.{self.name}.{name}'
+                    if journal is not None and journal.applied(journal_key, spec_hash):
+                        result.resumed.append(name)
+                        continue
+                    try:
+                        kwargs = self._request_kwargs(deadline)
+                    except DeadlineExceeded as e:
+                        logging.warning(f'skipping {name} {e}')
+                        result.skipped.append(name)
+                        continue
+                    running.append(
+                        (name, journal_key, pool.submit(_timed, operation, **kwargs)))
+                for name, journal_key, future in running:
+                    response, error, result.timings[name] = future.result()
+                    result.append(response)
+                    if error is not None:
+                        logging.error(f'{name} failed {error}')
+                        result.failed.append(name)
+                        result.errors[name] = error
+                        continue
+                    result.completed.append(name)
+                    if journal is not None:
+                        journal.record(journal_key, spec_hash)
+        if journal is not None:
+            self._flush_journal(journal, deadline)
+        return result
+
+    def _api(self, api_type):
+        """
+        Return the api_type api of this component, built once over the
+        shared ApiClient for its configuration
+        """
+        apis = self.__dict__.setdefault('_apis', {})
+        entry = apis.get(api_type)
+        if entry is None or entry[0] is not self.configuration:
+            entry = (self.configuration, api_type(shared_api_client(self.configuration)))
+            apis[api_type] = entry
+        return entry[1]
+
+    def _resource(self, name, body, depends_on=()):
+        return Resource(
+            name,
+            body,
+            getattr(self, f'_create_{name}'),
+            getattr(self, f'_patch_{name}'),
+            getattr(self, f'_delete_{name}'),
+            tuple(depends_on),
+            partial(self._server_side_apply, body),
+        )
+
+    def _server_side_apply(self, body, force=False, **kwargs):
+        return server_side_apply(
+            shared_api_client(self.configuration), body(), force=force, **kwargs)
+
+    @staticmethod
+    def _request_kwargs(deadline):
+        if deadline is None:
+            return {}
+        return {'_request_timeout': deadline.request_timeout()}
+
+    def _journal_kwargs(self, deadline):
+        try:
+            return self._request_kwargs(deadline)
+        except DeadlineExceeded:
+            return {'_request_timeout': MIN_REQUEST_TIMEOUT_SECS}
+
+    def _flush_journal(self, journal, deadline):
+        try:
+            journal.flush(**self._journal_kwargs(deadline))
+        except (kubernetes.client.rest.ApiException,
+                urllib3.exceptions.HTTPError) as e:
+            logging.error(f'could not write journal {journal.name} {e}')
@@ -0,0 +1,100 @@
+import logging
+import threading
+import time
+
+ADVISORY_REFRESH_SECS = 10 * 60
+MANDATORY_REFRESH_SECS = 2 * 60
+
+
+class RoleCredentialCache(object):
+    """
+    Thread safe cache of temporary credentials returned by sts assume_role.
+
+    Credentials are reused until they come within advisory_refresh seconds
+    of their Expiration, at which point they are refreshed in a background
+    thread while the current credentials keep being served. Within
+    mandatory_refresh seconds of expiry callers block on the refresh.
+    """
+    def __init__(self,
+                 advisory_refresh=ADVISORY_REFRESH_SECS,
+                 mandatory_refresh=MANDATORY_REFRESH_SECS):
+        self._advisory_refresh = advisory_refresh
+        self._mandatory_refresh = mandatory_refresh
+        self._credentials = {}
+        self._key_locks = {}
+        self._refreshing = set()
+        self._lock = threading.Lock()
+
+    def get(self, key, fetch):
+        """
+        Return the credentials cached for key, calling fetch to obtain
+        new credentials when they are missing or about to expire
+        """
+        with self._lock:
+            credentials = self._credentials.get(key)
+        remaining = self._remaining(credentials)
+        if remaining <= self._mandatory_refresh:
+            return self._refresh(key, fetch)
+        if remaining <= self._advisory_refresh:
+            self._refresh_in_background(key, fetch)
+        return credentials
+
+    def invalidate(self, key):
+        """
+        Remove the credentials cached for key
+        """
+        with self._lock:
+            self._credentials.pop(key, None)
+
+    def clear(self):
+        """
+        Remove every cached credential
+        """
+        with self._lock:
+            self._credentials = {}
+
+    def _refresh(self, key, fetch):
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            # another thread may have refreshed while we were waiting
+            with self._lock:
+                credentials = self._credentials.get(key)
+            if self._remaining(credentials) > self._mandatory_refresh:
+                return credentials
+            credentials = fetch()
+            with self._lock:
+                self._credentials[key] = credentials
+            return credentials
+
+    def _refresh_in_background(self, key, fetch):
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+        thread = threading.Thread(
+            target=self._background_refresh,
+            args=(key, fetch),
+            daemon=True
+        )
+        thread.start()
+
+    def _background_refresh(self, key, fetch):
+        try:
+            credentials = fetch()
+            with self._lock:
+                self._credentials[key] = credentials
+        except Exception as e:
+            logging.warning(f'could not refresh credentials {e}')
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    @staticmethod
+    def _remaining(credentials):
+        if credentials is None:
+            return 0
+        return credentials['Expiration'].timestamp() - time.time()
+
+
+default_credential_cache = RoleCredentialCache()
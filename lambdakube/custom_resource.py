@@ -0,0 +1,340 @@
+"""Helpers for CloudFormation custom resource handlers
+
+CloudFormation sends an Update request with both the old and the new
+resource properties. Components are built from each set of properties
+with a component factory, and only the resources whose bodies differ are
+patched, so an Update which changes nothing a component applies makes no
+kubernetes api requests.
+
+A Dispatcher serves a custom resource which installs several components
+on one cluster from a single lambda:
+
+    Type: Custom::LambdaKube
+    Properties:
+      ServiceToken: !GetAtt Dispatcher.Arn
+      ClusterName: my-cluster
+      Region: eu-west-1
+      Components:
+        - Type: CloudWatchAgent
+          Properties:
+            ClusterName: my-cluster
+            Region: eu-west-1
+        - Type: ExternalDNS
+          Properties:
+            RoleArn: arn:aws:iam::123456789012:role/external-dns
+            DnsDomain: example.com
+
+Component properties are passed to the component as keyword arguments
+with their names converted to snake case, and the components are
+deployed concurrently over one shared api client. ClusterRoleArn names a
+role to assume to reach the cluster.
+"""
+from lambdakube.component import OperationResult
+from lambdakube.deadline import MIN_REQUEST_TIMEOUT_SECS, as_deadline
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+import importlib
+import logging
+import os
+import re
+
+IGNORED_PROPERTIES = ('ServiceToken',)
+MAX_WORKERS = 4
+
+COMPONENT_TYPES = {
+    'ALBIngress': 'lambdakube.alb_ingress',
+    'CloudWatchAgent': 'lambdakube.cloudwatch_agent',
+    'ExternalDNS': 'lambdakube.external_dns',
+    'FluentdAgent': 'lambdakube.fluentd_agent',
+}
+
+UpdatePlan = namedtuple('UpdatePlan', ['properties', 'resources'])
+
+
+def changed_properties(event):
+    """
+    Return the names of the properties which differ between
+    OldResourceProperties and ResourceProperties
+    """
+    old = event.get('OldResourceProperties') or {}
+    new = event.get('ResourceProperties') or {}
+    return sorted(
+        key for key in set(old) | set(new)
+        if key not in IGNORED_PROPERTIES and old.get(key) != new.get(key)
+    )
+
+
+def plan_update(event, component_factory):
+    """
+    Return an UpdatePlan of the changed properties and the names of the
+    resources which need patching. component_factory(properties) returns
+    the component for a set of resource properties.
+    """
+    properties = changed_properties(event)
+    if not properties:
+        return UpdatePlan(properties, [])
+    component = component_factory(event.get('ResourceProperties') or {})
+    previous = component_factory(event.get('OldResourceProperties') or {})
+    return UpdatePlan(properties, component.changed_resources(previous))
+
+
+def update(event, component_factory, deadline=None, journal=None,
+           server_side=False, force=False):
+    """
+    Patch only the resources changed by an Update request, creating any
+    which turn out to be missing, and return an empty OperationResult
+    when there is nothing to patch. server_side and force are passed to
+    Component.apply.
+    """
+    plan = plan_update(event, component_factory)
+    if not plan.resources:
+        logging.info(f'nothing to patch, changed properties {plan.properties}')
+        return OperationResult()
+    logging.info(f'patching {plan.resources}, changed properties {plan.properties}')
+    return component_factory(event.get('ResourceProperties') or {}).apply(
+        deadline=deadline,
+        journal=journal,
+        resources=plan.resources,
+        prefer='patch',
+        server_side=server_side,
+        force=force,
+    )
+
+
+def failed_operations(result):
+    """
+    Return the failed operations of an OperationResult, leaving out
+    deletes of resources which were already gone
+    """
+    return [
+        name for name in result.failed
+        if not (name.startswith('delete_')
+                and getattr(result.errors.get(name), 'status', None) == 404)
+    ]
+
+
+def component_parameters(properties):
+    """
+    Return component keyword arguments for CamelCase properties
+    """
+    return {
+        re.sub(r'(?<!^)(?=[A-Z][a-z])', '_', key).lower(): value
+        for key, value in properties.items()
+    }
+
+
+class Dispatcher(object):
+    """
+    Handle custom resource requests for a list of component specs,
+    running the create, update or delete of each component concurrently.
+    With server_side, components are applied with server side apply.
+    With journal, progress is recorded in a Journal of the request, so a
+    retried invocation resumes where the previous one stopped, and the
+    journal is deleted once the request has run.
+    Components whose errors evict the cluster from the registry, because
+    the token was rejected or the cluster info looks stale, are run once
+    more with a fresh client, which describes the cluster again.
+    """
+    def __init__(self,
+                 component_types=None,
+                 registry=None,
+                 max_workers=MAX_WORKERS,
+                 server_side=False,
+                 force=False,
+                 journal=True):
+        self._component_types = component_types or COMPONENT_TYPES
+        self._registry = registry
+        self._max_workers = max_workers
+        self._server_side = server_side
+        self._force = force
+        self._use_journal = journal
+
+    @property
+    def registry(self):
+        if self._registry is None:
+            from lambdakube.registry import default_registry
+            self._registry = default_registry
+        return self._registry
+
+    def handle(self, event, context):
+        """
+        Dispatch the request and send the response to CloudFormation
+        """
+        import lambdakube.cfn_response as cfnresponse
+
+        status, data = cfnresponse.FAILED, {}
+        try:
+            status, data = self.dispatch(event, context)
+        except Exception as e:
+            logging.error(f'Unhandled exception {e}', exc_info=True)
+        finally:
+            cfnresponse.send(
+                event, context, status, data,
+                physicalResourceId=self.physical_resource_id(event))
+        return status
+
+    def dispatch(self, event, context=None):
+        """
+        Run the request for every component, returning the response
+        status and a dict of component name to its report. A Create or
+        Update fails when any component has failed operations, a Delete
+        only when a component did not finish.
+        """
+        import lambdakube.cfn_response as cfnresponse
+
+        properties = event.get('ResourceProperties') or {}
+        cluster_id = properties.get('ClusterName', os.environ.get('EKS_CLUSTER_NAME'))
+        region = properties.get('Region', os.environ.get('AWS_DEFAULT_REGION'))
+        role_arn = properties.get('ClusterRoleArn')
+        configuration = self.registry.get_api_client(cluster_id, region, role_arn=role_arn)
+        deadline = as_deadline(context)
+
+        journal = self._journal(event, configuration)
+        try:
+            results, evicted = self._run_tasks(
+                self._tasks(event, configuration), deadline, journal,
+                cluster_id, region, role_arn)
+            if evicted:
+                logging.warning(f'retrying {evicted} with a fresh client')
+                configuration = self.registry.get_api_client(
+                    cluster_id, region, role_arn=role_arn)
+                journal = self._journal(event, configuration)
+                tasks = self._tasks(event, configuration)
+                retried, _ = self._run_tasks(
+                    {name: tasks[name] for name in evicted if name in tasks},
+                    deadline, journal, cluster_id, region, role_arn)
+                results.update(retried)
+        finally:
+            self._delete_journal(journal, deadline)
+
+        status = cfnresponse.SUCCESS
+        for name, result in results.items():
+            if result is None or result.skipped:
+                logging.error(f'{name} did not finish')
+                status = cfnresponse.FAILED
+            elif event['RequestType'] != 'Delete' and failed_operations(result):
+                logging.error(f'{name} failed {failed_operations(result)}')
+                status = cfnresponse.FAILED
+        data = {
+            name: result.report() if result is not None else 'Error'
+            for name, result in results.items()
+        }
+        return status, data
+
+    def physical_resource_id(self, event):
+        """
+        Return a physical resource id which stays the same across updates
+        """
+        if event.get('PhysicalResourceId'):
+            return event['PhysicalResourceId']
+        properties = event.get('ResourceProperties') or {}
+        cluster_id = properties.get('ClusterName', os.environ.get('EKS_CLUSTER_NAME'))
+        return f'{cluster_id}-{event["LogicalResourceId"]}'
+
+    def _run_tasks(self, tasks, deadline, journal, cluster_id, region, role_arn):
+        """
+        Run the tasks concurrently and report their errors to the registry,
+        returning their results and the names of the tasks whose errors
+        evicted the cluster
+        """
+        results, evicted = {}, []
+        if not tasks:
+            return results, evicted
+        with ThreadPoolExecutor(max_workers=min(len(tasks), self._max_workers)) as pool:
+            futures = {
+                name: pool.submit(task, deadline, journal) for name, task in tasks.items()
+            }
+        for name, future in futures.items():
+            try:
+                results[name] = future.result()
+                reported = self.registry.report_result(
+                    cluster_id, region, results[name], role_arn=role_arn)
+            except Exception as e:
+                logging.error(f'{name} failed {e}', exc_info=True)
+                reported = self.registry.report_error(cluster_id, region, e, role_arn=role_arn)
+                results[name] = None
+            if reported:
+                evicted.append(name)
+        return results, evicted
+
+    def _tasks(self, event, configuration):
+        request_type = event['RequestType']
+        specs = self._specs(event.get('ResourceProperties'))
+        if request_type == 'Create':
+            return {
+                name: self._apply(self._component(spec, configuration))
+                for name, spec in specs.items()
+            }
+        if request_type == 'Delete':
+            return {
+                name: self._component(spec, configuration).delete
+                for name, spec in specs.items()
+            }
+        if request_type != 'Update':
+            raise ValueError(f'unknown request type {request_type}')
+
+        old_specs = self._specs(event.get('OldResourceProperties'))
+        tasks = {}
+        for name, spec in specs.items():
+            component = self._component(spec, configuration)
+            old_spec = old_specs.get(name)
+            if old_spec is None:
+                tasks[name] = self._apply(component)
+                continue
+            if old_spec == spec:
+                continue
+            resources = component.changed_resources(
+                self._component(old_spec, configuration))
+            if resources:
+                tasks[name] = self._apply(component, resources, prefer='patch')
+        for name, old_spec in old_specs.items():
+            if name not in specs:
+                tasks[name] = self._component(old_spec, configuration).delete
+        return tasks
+
+    def _apply(self, component, resources=None, prefer='create'):
+        def apply(deadline, journal):
+            return component.apply(
+                deadline=deadline,
+                journal=journal,
+                resources=resources,
+                prefer=prefer,
+                server_side=self._server_side,
+                force=self._force,
+            )
+        return apply
+
+    def _journal(self, event, configuration):
+        if not self._use_journal:
+            return None
+        from lambdakube.journal import Journal
+        return Journal.from_event(configuration, event)
+
+    @staticmethod
+    def _delete_journal(journal, deadline):
+        if journal is None:
+            return
+        kwargs = {} if deadline is None else {
+            '_request_timeout': max(deadline.remaining(), MIN_REQUEST_TIMEOUT_SECS)}
+        try:
+            journal.delete(**kwargs)
+        except Exception as e:
+            logging.error(f'could not delete journal {journal.name} {e}')
+
+    @staticmethod
+    def _specs(properties):
+        specs = {}
+        for spec in (properties or {}).get('Components', []):
+            name = spec.get('Properties', {}).get('Name', spec['Type'])
+            specs[name] = spec
+        return specs
+
+    def _component(self, spec, configuration):
+        module_name = self._component_types.get(spec['Type'])
+        if module_name is None:
+            raise ValueError(f'unknown component type {spec["Type"]}')
+        component_type = getattr(importlib.import_module(module_name), spec['Type'])
+        return component_type(
+            configuration=configuration,
+            **component_parameters(spec.get('Properties', {}))
+        )
@@ -0,0 +1,69 @@
+from lambdakube.exceptions import DeadlineExceeded
+import time
+
+# a single response PUT to S3, which cfn_response.send fits its retries into
+RESERVE_SECS = 5
+MAX_RESERVE_FRACTION = 0.25
+MIN_REQUEST_TIMEOUT_SECS = 1
+
+
+class Deadline(object):
+    """
+    Point in time by which an operation has to stop, keeping reserve
+    seconds back so the handler can still answer CloudFormation
+    """
+    def __init__(self, expires_at, reserve=RESERVE_SECS):
+        self._expires_at = expires_at - reserve
+
+    @classmethod
+    def from_context(cls, context, reserve=None):
+        """
+        Return a deadline for the remaining time of a lambda context. The
+        default reserve is RESERVE_SECS, capped at MAX_RESERVE_FRACTION of
+        the remaining time so short lambdas still get work done.
+        """
+        remaining = context.get_remaining_time_in_millis() / 1000
+        if reserve is None:
+            reserve = min(RESERVE_SECS, remaining * MAX_RESERVE_FRACTION)
+        return cls(time.monotonic() + remaining, reserve=reserve)
+
+    @classmethod
+    def from_timeout(cls, timeout, reserve=0):
+        """
+        Return a deadline timeout seconds from now
+        """
+        return cls(time.monotonic() + timeout, reserve=reserve)
+
+    def remaining(self):
+        """
+        Return the seconds left before the deadline
+        """
+        return max(0, self._expires_at - time.monotonic())
+
+    def expired(self):
+        return self.remaining() <= 0
+
+    def request_timeout(self, max_timeout=None):
+        """
+        Return the timeout to use for the next api request, raising
+        DeadlineExceeded if too little time is left to make one
+        """
+        remaining = self.remaining()
+        if remaining < MIN_REQUEST_TIMEOUT_SECS:
+            raise DeadlineExceeded(f'{remaining:.1f}s left before the deadline')
+        if max_timeout is not None:
+            return min(remaining, max_timeout)
+        return remaining
+
+
+def as_deadline(deadline):
+    """
+    Return deadline as a Deadline, accepting a lambda context, a Deadline
+    or None. Anything else, such as the empty context used when running a
+    handler locally, means no deadline.
+    """
+    if isinstance(deadline, Deadline):
+        return deadline
+    if hasattr(deadline, 'get_remaining_time_in_millis'):
+        return Deadline.from_context(deadline)
+    return None
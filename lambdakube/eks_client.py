@@ -1,15 +1,157 @@
+from lambdakube.cache import ExpiringCache
+from lambdakube.client_pool import default_client_pool
+from lambdakube.deadline import Deadline, as_deadline
+from lambdakube.exceptions import DeadlineExceeded, EKSClusterError
+from urllib.parse import urlparse
+import random
+import socket
+import ssl
+import time
+
+CLUSTER_INFO_TTL_SECS = 15 * 60
+ACTIVE_STATUS = 'ACTIVE'
+TERMINAL_STATUSES = ('FAILED', 'DELETING')
+WAIT_TIMEOUT_SECS = 10 * 60
+WAIT_INITIAL_DELAY_SECS = 2
+WAIT_MAX_DELAY_SECS = 30
+ENDPOINT_TIMEOUT_SECS = 5
+
+default_cluster_info_cache = ExpiringCache()
+
+
+def is_stale_cluster_error(error):
+    """
+    Return True if error is a TLS or connection failure which suggests
+    the cached cluster endpoint or certificate authority is stale
+    """
+    import urllib3.exceptions
+
+    if isinstance(error, urllib3.exceptions.MaxRetryError):
+        error = error.reason
+    return isinstance(error, (
+        ssl.SSLError,
+        ConnectionError,
+        urllib3.exceptions.SSLError,
+        urllib3.exceptions.NewConnectionError,
+        urllib3.exceptions.ProtocolError,
+    ))
 
 
 class EKSClient(object):
-    def __init__(self, session, cluster_name):
+    def __init__(self,
+                 session,
+                 cluster_name,
+                 region_name=None,
+                 client_pool=None,
+                 cluster_info_cache=None,
+                 cluster_info_ttl=CLUSTER_INFO_TTL_SECS):
         self._session = session
         self._cluster_name = cluster_name
+        self._region_name = region_name
+        self._client_pool = client_pool or default_client_pool
+        self._cluster_info_cache = cluster_info_cache or default_cluster_info_cache
+        self._cluster_info_ttl = cluster_info_ttl
+
+    def get_client(self):
+        """
+        Return the pooled eks client
+        """
+        return self._client_pool.get_client(
+            self._session,
+            'eks',
+            region_name=self._region_name
+        )
 
     def get_cluster_info(self):
         """
         Use an eks describe-cluster call to get the cluster information
         """
-        client = self._session.create_client("eks")
+        client = self.get_client()
         full_description = client.describe_cluster(name=self._cluster_name)
 
         return full_description
+
+    def get_cached_cluster_info(self):
+        """
+        Return the cluster endpoint, certificate authority and arn,
+        describing the cluster only when the cached copy has expired
+        """
+        key = (self._cluster_name, self._region_name)
+        cluster_info = self._cluster_info_cache.get(key)
+        if cluster_info is None:
+            cluster_info = self._cache_cluster_info(self.get_cluster_info()['cluster'])
+        return cluster_info
+
+    def wait_until_active(self,
+                          deadline=None,
+                          initial_delay=WAIT_INITIAL_DELAY_SECS,
+                          max_delay=WAIT_MAX_DELAY_SECS,
+                          check_endpoint=True,
+                          sleep=time.sleep):
+        """
+        Poll describe-cluster with jittered exponential backoff until the
+        cluster is ACTIVE and its endpoint accepts connections, then
+        return the cluster description. deadline may be a Deadline or a
+        lambda context, and defaults to WAIT_TIMEOUT_SECS. Raises
+        EKSClusterError if the cluster is missing, failed or being deleted,
+        and DeadlineExceeded if it is not ready before the deadline.
+        """
+        deadline = as_deadline(deadline) or Deadline.from_timeout(WAIT_TIMEOUT_SECS)
+        attempt = 0
+        while True:
+            cluster = self._describe_cluster()
+            status = cluster.get('status')
+            if status in TERMINAL_STATUSES:
+                raise EKSClusterError(f'cluster {self._cluster_name} is {status}')
+            if status == ACTIVE_STATUS:
+                if not check_endpoint or self._endpoint_accepts_connections(
+                        cluster['endpoint'], deadline):
+                    self._cache_cluster_info(cluster)
+                    return cluster
+                status = 'ACTIVE, endpoint not reachable'
+
+            delay = random.uniform(0, min(max_delay, initial_delay * 2 ** attempt))
+            if deadline.remaining() <= delay:
+                raise DeadlineExceeded(
+                    f'cluster {self._cluster_name} is still {status}')
+            sleep(delay)
+            attempt += 1
+
+    def _describe_cluster(self):
+        try:
+            return self.get_cluster_info()['cluster']
+        except Exception as e:
+            code = getattr(e, 'response', {}).get('Error', {}).get('Code')
+            if code == 'ResourceNotFoundException':
+                raise EKSClusterError(f'cluster {self._cluster_name} does not exist') from e
+            raise
+
+    @staticmethod
+    def _endpoint_accepts_connections(endpoint, deadline):
+        url = urlparse(endpoint)
+        timeout = min(ENDPOINT_TIMEOUT_SECS, max(deadline.remaining(), 0.1))
+        try:
+            socket.create_connection((url.hostname, url.port or 443), timeout=timeout).close()
+            return True
+        except OSError:
+            return False
+
+    def _cache_cluster_info(self, cluster):
+        cluster_info = {
+            'endpoint': cluster['endpoint'],
+            'certificateAuthority': {
+                'data': cluster['certificateAuthority']['data']
+            },
+            'arn': cluster['arn'],
+        }
+        self._cluster_info_cache.set(
+            (self._cluster_name, self._region_name),
+            cluster_info,
+            time.time() + self._cluster_info_ttl)
+        return cluster_info
+
+    def invalidate(self):
+        """
+        Forget the cached cluster information
+        """
+        self._cluster_info_cache.invalidate((self._cluster_name, self._region_name))
@@ -8,3 +8,7 @@ class EKSError(Exception):
 
 class EKSClusterError(EKSError):
     """ Raised when a cluster is not in the correct state."""
+
+
+class DeadlineExceeded(LambdaKubeError):
+    """ Raised when there is no time left to run an operation."""
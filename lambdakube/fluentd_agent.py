@@ -1,13 +1,13 @@
+from lambdakube.component import Component
 from lambdakube.lambda_kube import metadata
 import kubernetes.client as client
-import kubernetes.client.rest
 import os
 
 IMAGE = 'fluent/fluentd-kubernetes-daemonset:v1.7.3-debian-cloudwatch-1.0'
 CONFIG_HASH = '8915de4cf9c3551a8dc74c0137a3e83569d28c71044b0359c2578d2e0461825'
 
 
-class FluentdAgent(object):
+class FluentdAgent(Component):
     def __init__(self,
                  name='fluentd',
                  namespace='amazon-cloudwatch',
@@ -31,15 +31,15 @@ class FluentdAgent(object):
 
     @property
     def apps_v1_api(self):
-        return client.AppsV1Api(self.configuration)
+        return self._api(client.AppsV1Api)
 
     @property
     def core_v1_api(self):
-        return client.CoreV1Api(self.configuration)
+        return self._api(client.CoreV1Api)
 
     @property
     def rbac_v1_api(self):
-        return client.RbacAuthorizationV1Api(self.configuration)
+        return self._api(client.RbacAuthorizationV1Api)
 
     @property
     def labels(self):
@@ -49,62 +49,40 @@ class FluentdAgent(object):
     def file_path(self):
         return os.path.dirname(__file__)
 
-    def create(self):
+    def resources(self):
         return [
-            self._create_namespace(),
-            self._create_daemonset(),
-            self._create_configmap(),
-            self._create_service_account(),
-            self._create_cluster_role(),
-            self._create_cluster_role_binding(),
+            self._resource('namespace', self._namespace),
+            self._resource('service_account', self._service_account,
+                           depends_on=['namespace']),
+            self._resource('cluster_role', self._cluster_role),
+            self._resource('configmap', self._configmap,
+                           depends_on=['namespace']),
+            self._resource('cluster_role_binding', self._cluster_role_binding,
+                           depends_on=['service_account', 'cluster_role']),
+            self._resource('daemonset', self._daemon_set,
+                           depends_on=['configmap', 'cluster_role_binding']),
         ]
 
-    def patch(self):
-        return [
-            self._patch_namespace(),
-            self._patch_daemonset(),
-            self._patch_configmap(),
-            self._patch_service_account(),
-            self._patch_cluster_role(),
-            self._patch_cluster_role_binding(),
-        ]
-
-    def delete(self):
-        return [
-            self._delete_namespace(),
-            self._delete_daemonset(),
-            self._delete_configmap(),
-            self._delete_service_account(),
-            self._delete_cluster_role(),
-            self._delete_cluster_role_binding(),
-        ]
+    def _create_namespace(self, **kwargs):
+        return self.core_v1_api.create_namespace(
+            body=self._namespace(),
+            pretty=self.pretty,
+            **kwargs
+        )
 
-    def _create_namespace(self):
-        try:
-            return self.core_v1_api.create_namespace(
-                body=self._namespace(),
-                pretty=self.pretty,
-            )
-        except kubernetes.client.rest.ApiException as e:
-            print(e)
-
-    def _patch_namespace(self):
-        try:
-            return self.core_v1_api.patch_namespace(
-                name=self.namespace,
-                body=self._namespace(),
-                pretty=self.pretty,
-            )
-        except kubernetes.client.rest.ApiException as e:
-            print(e)
+    def _patch_namespace(self, **kwargs):
+        return self.core_v1_api.patch_namespace(
+            name=self.namespace,
+            body=self._namespace(),
+            pretty=self.pretty,
+            **kwargs
+        )
 
-    def _delete_namespace(self):
-        try:
-            return self.core_v1_api.delete_namespace(
-                name=self.namespace,
-            )
-        except kubernetes.client.rest.ApiException as e:
-            print(e)
+    def _delete_namespace(self, **kwargs):
+        return self.core_v1_api.delete_namespace(
+            name=self.namespace,
+            **kwargs
+        )
 
     def _namespace(self):
         return client.V1Namespace(
@@ -116,34 +94,28 @@ class FluentdAgent(object):
                 )
             )
 
-    def _create_daemonset(self):
-        try:
-            return self.apps_v1_api.create_namespaced_daemon_set(
-                namespace=self.namespace,
-                body=self._daemon_set()
-            )
-        except kubernetes.client.rest.ApiException as e:
-            print(e)
+    def _create_daemonset(self, **kwargs):
+        return self.apps_v1_api.create_namespaced_daemon_set(
+            namespace=self.namespace,
+            body=self._daemon_set(),
+            **kwargs
+        )
 
-    def _patch_daemonset(self):
-        try:
-            return self.apps_v1_api.patch_namespaced_daemon_set(
-                name=self.name,
-                namespace=self.namespace,
-                body=self._daemon_set()
-            )
-        except kubernetes.client.rest.ApiException as e:
-            print(e)
+    def _patch_daemonset(self, **kwargs):
+        return self.apps_v1_api.patch_namespaced_daemon_set(
+            name=self.name,
+            namespace=self.namespace,
+            body=self._daemon_set(),
+            **kwargs
+        )
 
-    def _delete_daemonset(self):
-        try:
-            return self.apps_v1_api.patch_namespaced_daemon_set(
-                name=self.name,
-                namespace=self.namespace,
-                body=self._daemon_set()
-            )
-        except kubernetes.client.rest.ApiException as e:
-            print(e)
+    def _delete_daemonset(self, **kwargs):
+        return self.apps_v1_api.patch_namespaced_daemon_set(
+            name=self.name,
+            namespace=self.namespace,
+            body=self._daemon_set(),
+            **kwargs
+        )
 
     def _daemon_set(self):
         return client.V1DaemonSet(
@@ -277,35 +249,29 @@ class FluentdAgent(object):
             )
         )
 
-    def _create_configmap(self):
-        try:
-            return self.core_v1_api.create_namespaced_config_map(
-                namespace=self.namespace,
-                body=self._configmap(),
-                pretty=self.pretty,
-            )
-        except kubernetes.client.rest.ApiException as e:
-            print(e)
+    def _create_configmap(self, **kwargs):
+        return self.core_v1_api.create_namespaced_config_map(
+            namespace=self.namespace,
+            body=self._configmap(),
+            pretty=self.pretty,
+            **kwargs
+        )
 
-    def _patch_configmap(self):
-        try:
-            return self.core_v1_api.patch_namespaced_config_map(
-                name=self.config_map_name,
-                namespace=self.namespace,
-                body=self._configmap(),
-                pretty=self.pretty,
-            )
-        except kubernetes.client.rest.ApiException as e:
-            print(e)
+    def _patch_configmap(self, **kwargs):
+        return self.core_v1_api.patch_namespaced_config_map(
+            name=self.config_map_name,
+            namespace=self.namespace,
+            body=self._configmap(),
+            pretty=self.pretty,
+            **kwargs
+        )
 
-    def _delete_configmap(self):
-        try:
-            return self.core_v1_api.delete_namespaced_config_map(
-                name=self.config_map_name,
-                namespace=self.namespace
-            )
-        except kubernetes.client.rest.ApiException as e:
-            print(e)
+    def _delete_configmap(self, **kwargs):
+        return self.core_v1_api.delete_namespaced_config_map(
+            name=self.config_map_name,
+            namespace=self.namespace,
+            **kwargs
+        )
 
     def _configmap(self):
         return client.V1ConfigMap(
@@ -324,35 +290,29 @@ class FluentdAgent(object):
             })
         )
 
-    def _create_service_account(self):
-        try:
-            return self.core_v1_api.create_namespaced_service_account(
-                namespace=self.namespace,
-                body=self._service_account(),
-                pretty=self.pretty
-            )
-        except kubernetes.client.rest.ApiException as e:
-            print(e)
+    def _create_service_account(self, **kwargs):
+        return self.core_v1_api.create_namespaced_service_account(
+            namespace=self.namespace,
+            body=self._service_account(),
+            pretty=self.pretty,
+            **kwargs
+        )
 
-    def _patch_service_account(self):
-        try:
-            return self.core_v1_api.patch_namespaced_service_account(
-                name=self.name,
-                namespace=self.namespace,
-                body=self._service_account(),
-                pretty=self.pretty
-            )
-        except kubernetes.client.rest.ApiException as e:
-            print(e)
+    def _patch_service_account(self, **kwargs):
+        return self.core_v1_api.patch_namespaced_service_account(
+            name=self.name,
+            namespace=self.namespace,
+            body=self._service_account(),
+            pretty=self.pretty,
+            **kwargs
+        )
 
-    def _delete_service_account(self):
-        try:
-            return self.core_v1_api.delete_namespaced_service_account(
-                name=self.name,
-                namespace=self.namespace
-            )
-        except kubernetes.client.rest.ApiException as e:
-            print(e)
+    def _delete_service_account(self, **kwargs):
+        return self.core_v1_api.delete_namespaced_service_account(
+            name=self.name,
+            namespace=self.namespace,
+            **kwargs
+        )
 
     def _service_account(self):
         return client.V1ServiceAccount(
@@ -364,31 +324,25 @@ class FluentdAgent(object):
             )
         )
 
-    def _create_cluster_role(self):
-        try:
-            return self.rbac_v1_api.create_cluster_role(
-                body=self._cluster_role()
-            )
-        except kubernetes.client.rest.ApiException as e:
-            print(e)
+    def _create_cluster_role(self, **kwargs):
+        return self.rbac_v1_api.create_cluster_role(
+            body=self._cluster_role(),
+            **kwargs
+        )
 
-    def _patch_cluster_role(self):
-        try:
-            return self.rbac_v1_api.patch_cluster_role(
-                name=self.cluster_role_name,
-                body=self._cluster_role(),
-                pretty=self.pretty
-            )
-        except kubernetes.client.rest.ApiException as e:
-            print(e)
+    def _patch_cluster_role(self, **kwargs):
+        return self.rbac_v1_api.patch_cluster_role(
+            name=self.cluster_role_name,
+            body=self._cluster_role(),
+            pretty=self.pretty,
+            **kwargs
+        )
 
-    def _delete_cluster_role(self):
-        try:
-            return self.rbac_v1_api.delete_cluster_role(
-                name=self.cluster_role_name,
-            )
-        except kubernetes.client.rest.ApiException as e:
-            print(e)
+    def _delete_cluster_role(self, **kwargs):
+        return self.rbac_v1_api.delete_cluster_role(
+            name=self.cluster_role_name,
+            **kwargs
+        )
 
     def _cluster_role(self):
         return client.V1ClusterRole(
@@ -410,30 +364,24 @@ class FluentdAgent(object):
             ]
         )
 
-    def _create_cluster_role_binding(self):
-        try:
-            return self.rbac_v1_api.create_cluster_role_binding(
-                body=self._cluster_role_binding()
-            )
-        except kubernetes.client.rest.ApiException as e:
-            print(e)
+    def _create_cluster_role_binding(self, **kwargs):
+        return self.rbac_v1_api.create_cluster_role_binding(
+            body=self._cluster_role_binding(),
+            **kwargs
+        )
 
-    def _patch_cluster_role_binding(self):
-        try:
-            return self.rbac_v1_api.patch_cluster_role_binding(
-                name=self.cluster_role_binding_name,
-                body=self._cluster_role_binding()
-            )
-        except kubernetes.client.rest.ApiException as e:
-            print(e)
+    def _patch_cluster_role_binding(self, **kwargs):
+        return self.rbac_v1_api.patch_cluster_role_binding(
+            name=self.cluster_role_binding_name,
+            body=self._cluster_role_binding(),
+            **kwargs
+        )
 
-    def _delete_cluster_role_binding(self):
-        try:
-            return self.rbac_v1_api.delete_cluster_role_binding(
-                name=self.cluster_role_binding_name,
-            )
-        except kubernetes.client.rest.ApiException as e:
-            print(e)
+    def _delete_cluster_role_binding(self, **kwargs):
+        return self.rbac_v1_api.delete_cluster_role_binding(
+            name=self.cluster_role_binding_name,
+            **kwargs
+        )
 
     def _cluster_role_binding(self):
         return client.V1ClusterRoleBinding(
@@ -0,0 +1,167 @@
+from lambdakube.component import shared_api_client
+from lambdakube.lambda_kube import metadata
+import hashlib
+import kubernetes.client as client
+import kubernetes.client.rest
+import logging
+import re
+import threading
+import urllib3.exceptions
+
+JOURNAL_NAMESPACE = 'kube-system'
+JOURNAL_PREFIX = 'lambdakube-journal-'
+MAX_KEY_LENGTH = 253
+INVALID_KEY_CHARACTERS = re.compile(r'[^-._a-zA-Z0-9]')
+
+
+def data_key(key):
+    """
+    Return key as a valid ConfigMap data key. Keys with other characters,
+    like the Kind/namespace/name resource names of a Stack, have them
+    replaced with dots and a digest of the original key appended, so
+    different keys stay different.
+    """
+    if not INVALID_KEY_CHARACTERS.search(key) and len(key) <= MAX_KEY_LENGTH:
+        return key
+    digest = hashlib.sha256(key.encode('utf-8')).hexdigest()[:16]
+    prefix = INVALID_KEY_CHARACTERS.sub('.', key)[:MAX_KEY_LENGTH - len(digest) - 1]
+    return f'{prefix}.{digest}'
+
+
+class Journal(object):
+    """
+    Progress journal of a CloudFormation request, stored in a ConfigMap.
+
+    It records which operations have been applied at which spec hash, so
+    that a retried request can resume where the previous attempt stopped
+    instead of replaying every call. Call delete() when the request has
+    run, whatever the result, because CloudFormation does not send the
+    same request again once it has been answered. Dispatcher does this.
+    """
+    def __init__(self,
+                 configuration,
+                 request_id,
+                 namespace=JOURNAL_NAMESPACE,
+                 pretty=False):
+        self.configuration = configuration
+        self.request_id = request_id
+        self.namespace = namespace
+        self.name = JOURNAL_PREFIX + hashlib.sha256(
+            request_id.encode('utf-8')).hexdigest()[:16]
+        self.pretty = pretty
+        self._entries = None
+        self._pending = {}
+        self._exists = False
+        self._lock = threading.Lock()
+        self._core_v1_api = None
+
+    @classmethod
+    def from_event(cls, configuration, event, **kwargs):
+        """
+        Return the journal of a CloudFormation custom resource event
+        """
+        return cls(configuration, event['RequestId'], **kwargs)
+
+    @property
+    def core_v1_api(self):
+        if self._core_v1_api is None:
+            self._core_v1_api = client.CoreV1Api(shared_api_client(self.configuration))
+        return self._core_v1_api
+
+    def load(self, **kwargs):
+        """
+        Read the ConfigMap if it has not been read yet. A journal which
+        cannot be read is treated as empty, so the operations run again.
+        """
+        with self._lock:
+            self._load(**kwargs)
+
+    def applied(self, key, spec_hash):
+        """
+        Return True if key was applied at spec_hash
+        """
+        with self._lock:
+            self._load()
+            return self._entries.get(data_key(key)) == spec_hash
+
+    def record(self, key, spec_hash):
+        """
+        Record that key was applied at spec_hash, written on flush
+        """
+        with self._lock:
+            self._load()
+            self._entries[data_key(key)] = spec_hash
+            self._pending[data_key(key)] = spec_hash
+
+    def flush(self, **kwargs):
+        """
+        Write the pending records to the ConfigMap
+        """
+        with self._lock:
+            if not self._pending:
+                return
+            if self._exists:
+                self.core_v1_api.patch_namespaced_config_map(
+                    name=self.name,
+                    namespace=self.namespace,
+                    body={'data': self._pending},
+                    pretty=self.pretty,
+                    **kwargs
+                )
+            else:
+                self.core_v1_api.create_namespaced_config_map(
+                    namespace=self.namespace,
+                    body=self._configmap(self._entries),
+                    pretty=self.pretty,
+                    **kwargs
+                )
+                self._exists = True
+            self._pending = {}
+
+    def delete(self, **kwargs):
+        """
+        Delete the journal once the request has finished
+        """
+        with self._lock:
+            try:
+                self.core_v1_api.delete_namespaced_config_map(
+                    name=self.name,
+                    namespace=self.namespace,
+                    **kwargs
+                )
+            except kubernetes.client.rest.ApiException as e:
+                if e.status != 404:
+                    raise
+            self._entries = {}
+            self._pending = {}
+            self._exists = False
+
+    def _load(self, **kwargs):
+        if self._entries is not None:
+            return
+        try:
+            configmap = self.core_v1_api.read_namespaced_config_map(
+                name=self.name,
+                namespace=self.namespace,
+                **kwargs
+            )
+            self._entries = dict(configmap.data or {})
+            self._exists = True
+        except (kubernetes.client.rest.ApiException,
+                urllib3.exceptions.HTTPError) as e:
+            if getattr(e, 'status', None) != 404:
+                logging.error(f'could not read journal {self.name} {e}')
+            self._entries = {}
+
+    def _configmap(self, data):
+        return client.V1ConfigMap(
+            api_version='v1',
+            kind='ConfigMap',
+            metadata=metadata(
+                name=self.name,
+                namespace=self.namespace,
+                labels=dict({'app.kubernetes.io/managed-by': 'lambdakube'}),
+                annotations=dict({'lambdakube/request-id': self.request_id}),
+            ),
+            data=dict(data)
+        )
@@ -1,11 +1,19 @@
 from lambdakube.sts_client_factory import STSClientFactory
 from lambdakube.eks_client import EKSClient
-from lambdakube.token_generator import TokenGenerator
+from lambdakube.token_generator import (
+    TokenGenerator, TOKEN_REFRESH_MARGIN_SECS, default_token_cache, get_expiration
+)
 from lambdakube.exceptions import LambdaKubeError
-from kubernetes import client as client, config as kube_config
-import botocore.session
+from lambdakube.session import credential_identity, get_session
+from kubernetes import client as client
+import base64
+import hashlib
 import logging
-import yaml
+import os
+import tempfile
+import threading
+
+CA_CERT_DIR = '/tmp'
 
 logging.basicConfig()
 logger = logging.getLogger()
@@ -21,33 +29,120 @@ def metadata(name=None, namespace=None, labels=None, annotations=None):
     )
 
 
+def _new_configuration():
+    """
+    Return a new client configuration which does not copy the process
+    wide default
+    """
+    return type.__call__(client.Configuration)
+
+
+class RefreshingApiKey(dict):
+    """
+    api_key dict which calls refresh(configuration) before every read, for
+    kubernetes clients which predate Configuration.refresh_api_key_hook
+    """
+    def __init__(self, configuration, refresh):
+        super(RefreshingApiKey, self).__init__()
+        self._configuration = configuration
+        self._refresh = refresh
+
+    def __getitem__(self, key):
+        self._refresh(self._configuration)
+        return super(RefreshingApiKey, self).__getitem__(key)
+
+    def get(self, key, default=None):
+        self._refresh(self._configuration)
+        return super(RefreshingApiKey, self).get(key, default)
+
+
 class LambdaKube(object):
     def __init__(self,
                  cluster_id,
                  region,
                  role_arn=None,
                  username=None,
-                 session=botocore.session.get_session(),
-                 kube_config_filepath='/tmp/kubeconfig'
+                 session=None,
+                 kube_config_filepath='/tmp/kubeconfig',
+                 token_cache=None,
+                 cluster_info_cache=None,
+                 write_kubeconfig=False,
+                 ca_cert_dir=CA_CERT_DIR,
                  ):
         self.cluster_id = cluster_id
         self.region = region
         self.role_arn = role_arn
         self.username = username
-        self._session = session
+        self._explicit_session = session
         self._kube_config_filepath = kube_config_filepath
+        self._token_cache = token_cache or default_token_cache
+        self._cluster_info_cache = cluster_info_cache
+        self._write_kubeconfig_file = write_kubeconfig
+        self._ca_cert_dir = ca_cert_dir
+        self._api_client = None
+        self._lock = threading.Lock()
+
+    @property
+    def _session(self):
+        """
+        The botocore session given to the constructor, or the shared
+        lambdakube session which is created on first use
+        """
+        return self._explicit_session or get_session()
 
     def get_config(self):
+        """
+        Return the ApiClient owned by this instance, building it on first
+        use, when the kubeconfig file is also written if write_kubeconfig
+        was set. Nothing process wide is modified, so instances for
+        different clusters can be used concurrently.
+        """
         try:
-            self.update_kubeconfig()
-            return client.ApiClient(self._kube_client_configuration())
+            with self._lock:
+                if self._api_client is None:
+                    if self._write_kubeconfig_file:
+                        self._write_kubeconfig()
+                    self._api_client = client.ApiClient(
+                        self._kube_client_configuration())
+                return self._api_client
         except LambdaKubeError as e:
             logging.error(f'could not get config {e}')
 
+    def prime(self):
+        """
+        Do all cacheable work up front, for example during the lambda init
+        phase: load the service models, resolve credentials, describe the
+        cluster, write the CA file and mint the first token
+        """
+        if self.role_arn is not None:
+            STSClientFactory(self._session).get_sts_client(region_name=self.region)
+        self._eks_client().get_client()
+        self.get_config()
+        return self
+
+    def wait_until_active(self, deadline=None, **kwargs):
+        """
+        Wait for the cluster to be ACTIVE and reachable, see
+        EKSClient.wait_until_active
+        """
+        self._eks_client().wait_until_active(deadline=deadline, **kwargs)
+        return self
+
     def update_kubeconfig(self):
+        """
+        Write the kubeconfig file and return a configuration loaded from
+        it, without replacing the default client configuration
+        """
         try:
+            from kubernetes import config as kube_config
+
             self._write_kubeconfig()
-            kube_config.load_kube_config(self._kube_config_filepath)
+            configuration = _new_configuration()
+            kube_config.load_kube_config(
+                self._kube_config_filepath,
+                client_configuration=configuration
+            )
+            return configuration
         except LambdaKubeError as e:
             logging.error(f'could not update kubeconfig {e}')
 
@@ -55,30 +150,88 @@ class LambdaKube(object):
         """
         Return the kubernetes python client configuration
         """
-        configuration = client.Configuration()
-        configuration.api_key['authorization'] = self._get_token()
+        cluster_info = self._cluster_info()
+        configuration = _new_configuration()
+        configuration.host = cluster_info['endpoint']
+        configuration.ssl_ca_cert = self._write_ca_cert(
+            cluster_info['certificateAuthority']['data'])
+        if hasattr(configuration, 'refresh_api_key_hook'):
+            configuration.refresh_api_key_hook = self._refresh_api_key
+        else:
+            configuration.api_key = RefreshingApiKey(
+                configuration, self._refresh_api_key)
+        self._refresh_api_key(configuration)
         configuration.api_key_prefix['authorization'] = 'Bearer'
 
         return configuration
 
+    def _refresh_api_key(self, configuration):
+        """
+        Replace the bearer token of configuration shortly before it expires
+        """
+        configuration.api_key['authorization'] = self._get_token()
+
     def _get_token(self):
         """
-        Return bearer token
+        Return bearer token, reusing a cached token until shortly
+        before it expires
+        """
+        key = self._token_key()
+        token = self._token_cache.get(key, margin=TOKEN_REFRESH_MARGIN_SECS)
+        if token is None:
+            expires_at = get_expiration()
+            token = self._generate_token()
+            self._token_cache.set(key, token, expires_at)
+
+        return token
+
+    def _token_key(self):
+        """
+        Return the token cache key, which includes a digest of the access
+        key of the session so sessions with other credentials do not share
+        tokens
+        """
+        return (self.cluster_id, self.region, self.role_arn,
+                credential_identity(self._session))
+
+    def _generate_token(self):
+        """
+        Return a newly minted bearer token
         """
         session = self._session
 
         client_factory = STSClientFactory(session)
-        sts_client = client_factory.get_sts_client(
+        presigner = client_factory.get_presigner(
             region_name=self.region,
             role_arn=self.role_arn)
-        token = TokenGenerator(sts_client).get_token(self.cluster_id)
+        token = TokenGenerator(presigner).get_token(self.cluster_id)
 
         return token
 
+    def _write_ca_cert(self, certificate):
+        """
+        Write the base64 encoded certificate authority to a file named
+        after its hash, unless it already exists, and return the path. The
+        file is written to a unique temporary file first, so concurrent
+        writers never see a partial certificate.
+        """
+        digest = hashlib.sha256(certificate.encode('utf-8')).hexdigest()
+        filepath = os.path.join(self._ca_cert_dir, f'lambdakube-ca-{digest[:16]}.crt')
+        if not os.path.exists(filepath):
+            with tempfile.NamedTemporaryFile(dir=self._ca_cert_dir,
+                                             prefix=os.path.basename(filepath),
+                                             suffix='.tmp',
+                                             delete=False) as outfile:
+                outfile.write(base64.b64decode(certificate))
+            os.replace(outfile.name, filepath)
+        return filepath
+
     def _write_kubeconfig(self):
         """
         Write kubeconfig to filesystem
         """
+        import yaml
+
         content = self._generate_kubeconfig()
         with open(self._kube_config_filepath, 'w') as outfile:
             yaml.dump(content, outfile, default_flow_style=False)
@@ -127,11 +280,32 @@ class LambdaKube(object):
             ]
         }
 
+    def invalidate_token(self):
+        """
+        Forget the cached bearer token, for example after the api server
+        rejected it
+        """
+        self._token_cache.invalidate(self._token_key())
+
+    def invalidate_cluster_info(self):
+        """
+        Forget the cached cluster info, for example after a TLS or
+        connection error which suggests it is stale
+        """
+        self._eks_client().invalidate()
+        with self._lock:
+            self._api_client = None
+
     def _cluster_info(self):
         """
         Return the EKS cluster info
         """
+        return self._eks_client().get_cached_cluster_info()
+
+    def _eks_client(self):
         return EKSClient(
             self._session,
-            self.cluster_id
-        ).get_cluster_info()['cluster']
+            self.cluster_id,
+            region_name=self.region,
+            cluster_info_cache=self._cluster_info_cache
+        )
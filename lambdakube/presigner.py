@@ -0,0 +1,153 @@
+from datetime import datetime, timezone
+from urllib.parse import quote
+import hashlib
+import hmac
+
+ALGORITHM = 'AWS4-HMAC-SHA256'
+SERVICE_NAME = 'sts'
+API_VERSION = '2011-06-15'
+CLUSTER_NAME_HEADER = 'x-k8s-aws-id'
+SIGNED_HEADERS = f'host;{CLUSTER_NAME_HEADER}'
+EMPTY_PAYLOAD_HASH = hashlib.sha256(b'').hexdigest()
+SIGV4_TIMESTAMP = '%Y%m%dT%H%M%SZ'
+GLOBAL_ENDPOINT_URL = 'https://sts.amazonaws.com'
+GLOBAL_REGION = 'us-east-1'
+
+
+def sts_endpoint_url(region_name):
+    """
+    Return the regional sts endpoint for region_name, or the global
+    endpoint when there is no region
+    """
+    if region_name is None:
+        return GLOBAL_ENDPOINT_URL
+    suffix = '.cn' if region_name.startswith('cn-') else ''
+    return f'https://sts.{region_name}.amazonaws.com{suffix}'
+
+
+def _quote(value):
+    return quote(str(value), safe='-_.~')
+
+
+def _sign(key, msg):
+    return hmac.new(key, msg.encode('utf-8'), hashlib.sha256).digest()
+
+
+class Presigner(object):
+    """
+    Presign sts GetCallerIdentity urls from resolved credentials using
+    SigV4 query authentication, without a botocore client or service model.
+
+    It implements the subset of generate_presigned_url used by
+    TokenGenerator, so it can be passed in place of an sts client and
+    produces the same url botocore does for the same endpoint.
+    """
+    def __init__(self,
+                 access_key,
+                 secret_key,
+                 token=None,
+                 region_name=GLOBAL_REGION,
+                 endpoint_url=None):
+        self._access_key = access_key
+        self._secret_key = secret_key
+        self._token = token
+        # the global endpoint signs requests for us-east-1
+        self._region_name = region_name or GLOBAL_REGION
+        self._endpoint_url = endpoint_url or sts_endpoint_url(region_name)
+        self._host = self._endpoint_url.split('://', 1)[1].rstrip('/')
+        self._signing_keys = {}
+
+    @classmethod
+    def from_credentials(cls, credentials, region_name, endpoint_url=None):
+        """
+        Return a presigner for botocore credentials or an sts
+        Credentials dict
+        """
+        if isinstance(credentials, dict):
+            return cls(
+                credentials['AccessKeyId'],
+                credentials['SecretAccessKey'],
+                credentials.get('SessionToken'),
+                region_name=region_name,
+                endpoint_url=endpoint_url
+            )
+        credentials = credentials.get_frozen_credentials()
+        return cls(
+            credentials.access_key,
+            credentials.secret_key,
+            credentials.token,
+            region_name=region_name,
+            endpoint_url=endpoint_url
+        )
+
+    def generate_presigned_url(self,
+                               ClientMethod,
+                               Params=None,
+                               ExpiresIn=3600,
+                               HttpMethod='GET'):
+        if ClientMethod != 'get_caller_identity' or HttpMethod != 'GET':
+            raise ValueError(
+                f'only GET get_caller_identity can be presigned, not {ClientMethod}')
+        return self.presign(Params['ClusterName'], ExpiresIn)
+
+    def presign(self, cluster_name, expires_in, now=None):
+        """
+        Return a presigned GetCallerIdentity url with the cluster name
+        header signed in
+        """
+        now = now or datetime.now(timezone.utc)
+        timestamp = now.strftime(SIGV4_TIMESTAMP)
+        datestamp = timestamp[:8]
+        scope = f'{datestamp}/{self._region_name}/{SERVICE_NAME}/aws4_request'
+
+        operation_params = [('Action', 'GetCallerIdentity'), ('Version', API_VERSION)]
+        auth_params = [
+            ('X-Amz-Algorithm', ALGORITHM),
+            ('X-Amz-Credential', f'{self._access_key}/{scope}'),
+            ('X-Amz-Date', timestamp),
+            ('X-Amz-Expires', expires_in),
+            ('X-Amz-SignedHeaders', SIGNED_HEADERS),
+        ]
+        if self._token is not None:
+            auth_params.append(('X-Amz-Security-Token', self._token))
+
+        query_params = [(_quote(k), _quote(v)) for k, v in operation_params + auth_params]
+        canonical_query = '&'.join(f'{k}={v}' for k, v in sorted(query_params))
+        cluster_header = ' '.join(str(cluster_name).split())
+        canonical_request = '\n'.join([
+            'GET',
+            '/',
+            canonical_query,
+            f'host:{self._host}',
+            f'{CLUSTER_NAME_HEADER}:{cluster_header}',
+            '',
+            SIGNED_HEADERS,
+            EMPTY_PAYLOAD_HASH,
+        ])
+        string_to_sign = '\n'.join([
+            ALGORITHM,
+            timestamp,
+            scope,
+            hashlib.sha256(canonical_request.encode('utf-8')).hexdigest(),
+        ])
+        signature = hmac.new(
+            self._signing_key(datestamp),
+            string_to_sign.encode('utf-8'),
+            hashlib.sha256
+        ).hexdigest()
+
+        query_string = '&'.join(f'{k}={v}' for k, v in query_params)
+        return (f'https://{self._host}/?{query_string}'
+                f'&X-Amz-Signature={signature}')
+
+    def _signing_key(self, datestamp):
+        # the signing key only depends on the day, so it is derived once
+        # per day and reused for every url signed with these credentials
+        key = self._signing_keys.get(datestamp)
+        if key is None:
+            key = _sign(f'AWS4{self._secret_key}'.encode('utf-8'), datestamp)
+            key = _sign(key, self._region_name)
+            key = _sign(key, SERVICE_NAME)
+            key = _sign(key, 'aws4_request')
+            self._signing_keys = {datestamp: key}
+        return key
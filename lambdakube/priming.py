@@ -0,0 +1,82 @@
+"""Lambda init phase priming
+
+Call prime() at module level in a handler file so that the work it does
+runs during the lambda init phase, which does not count towards the
+invocation latency and is captured in SnapStart snapshots:
+
+    import lambdakube
+    from lambdakube import registry
+
+    lambdakube.prime(os.environ['EKS_CLUSTER_NAME'], os.environ['AWS_REGION'])
+
+    def handler(event, context):
+        configuration = registry.get_api_client(
+            os.environ['EKS_CLUSTER_NAME'], os.environ['AWS_REGION'])
+
+What is safe to snapshot:
+
+* the shared botocore session, with the service models its loader cached
+* pooled botocore clients
+* cluster endpoint, certificate authority and arn, and the CA file in /tmp
+* the LambdaKube instance and its client configuration
+
+What after_restore refreshes, because it is tied to the time or the
+execution environment the snapshot was taken in:
+
+* the credentials of the shared botocore session, resolved again on the
+  same session
+* assumed role credentials and bearer tokens
+* the connections of pooled botocore clients, which do not survive a
+  restore; the clients themselves are kept
+
+When the SnapStart runtime hooks are available after_restore is
+registered automatically by prime.
+"""
+from lambdakube.client_pool import default_client_pool
+from lambdakube.credential_cache import default_credential_cache
+from lambdakube.registry import default_registry
+from lambdakube.session import refresh_credentials
+from lambdakube.token_generator import default_token_cache
+import logging
+import threading
+
+_lock = threading.Lock()
+_after_restore_registered = False
+
+
+def prime(cluster_id, region, role_arn=None, **kwargs):
+    """
+    Return the registered LambdaKube for the cluster with all cacheable
+    work done
+    """
+    _register_after_restore()
+    return default_registry.get_lambda_kube(
+        cluster_id,
+        region,
+        role_arn=role_arn,
+        **kwargs
+    ).prime()
+
+
+def after_restore():
+    """
+    Drop state which must not be reused after a snapshot is restored
+    """
+    refresh_credentials()
+    default_credential_cache.clear()
+    default_token_cache.clear()
+    default_client_pool.close_connections()
+
+
+def _register_after_restore():
+    global _after_restore_registered
+    with _lock:
+        if _after_restore_registered:
+            return
+        _after_restore_registered = True
+    try:
+        from snapshot_restore_py import register_after_restore
+    except ImportError:
+        return
+    register_after_restore(after_restore)
+    logging.info('registered lambdakube after_restore hook')
@@ -0,0 +1,130 @@
+"""Registry of ready to use kubernetes api clients
+
+Handlers ask the registry for an ApiClient instead of building a new
+LambdaKube on every invocation, so warm lambda containers reuse the
+connection pool, token and cluster info:
+
+    from lambdakube import registry
+
+    def handler(event, context):
+        configuration = registry.get_api_client(cluster_id, region)
+        result = CloudWatchAgent(configuration=configuration).apply()
+        registry.report_result(cluster_id, region, result)
+
+Reporting the errors of a run evicts clients whose token was rejected or
+whose cluster info looks stale.
+"""
+from lambdakube.eks_client import CLUSTER_INFO_TTL_SECS, is_stale_cluster_error
+import threading
+import time
+
+# a 403 is an RBAC denial, which a new token does not fix
+AUTH_ERROR_STATUSES = (401,)
+
+
+class ClientRegistry(object):
+    """
+    Thread safe registry of LambdaKube instances keyed by cluster, region
+    and role arn. Entries are rebuilt after max_age seconds so cluster
+    changes are picked up, and evicted on authentication or connection
+    errors reported with report_error.
+    """
+    def __init__(self, max_age=CLUSTER_INFO_TTL_SECS):
+        self._max_age = max_age
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get_lambda_kube(self, cluster_id, region, role_arn=None, **kwargs):
+        """
+        Return the registered LambdaKube for the cluster, creating it with
+        kwargs when it is missing or expired
+        """
+        from lambdakube.lambda_kube import LambdaKube
+
+        key = (cluster_id, region, role_arn)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] + self._max_age <= time.time():
+                lambda_kube = LambdaKube(
+                    cluster_id=cluster_id,
+                    region=region,
+                    role_arn=role_arn,
+                    **kwargs
+                )
+                entry = (lambda_kube, time.time())
+                self._entries[key] = entry
+            return entry[0]
+
+    def get_api_client(self, cluster_id, region, role_arn=None, **kwargs):
+        """
+        Return a ready ApiClient for the cluster
+        """
+        return self.get_lambda_kube(
+            cluster_id, region, role_arn=role_arn, **kwargs).get_config()
+
+    def report_error(self, cluster_id, region, error, role_arn=None):
+        """
+        Evict the cluster if error is an authentication failure or a
+        connection failure suggesting stale cluster info. Returns True if
+        the entry was evicted.
+        """
+        auth_error = getattr(error, 'status', None) in AUTH_ERROR_STATUSES
+        stale_error = is_stale_cluster_error(error)
+        if not auth_error and not stale_error:
+            return False
+        with self._lock:
+            entry = self._entries.pop((cluster_id, region, role_arn), None)
+        if entry is not None:
+            if auth_error:
+                entry[0].invalidate_token()
+            if stale_error:
+                entry[0].invalidate_cluster_info()
+        return True
+
+    def report_result(self, cluster_id, region, result, role_arn=None):
+        """
+        Report the errors of the failed operations of an OperationResult,
+        returning True if the entry was evicted
+        """
+        evicted = False
+        for error in result.errors.values():
+            evicted = self.report_error(cluster_id, region, error, role_arn=role_arn) or evicted
+        return evicted
+
+    def evict(self, cluster_id, region, role_arn=None):
+        """
+        Remove the cluster from the registry
+        """
+        with self._lock:
+            self._entries.pop((cluster_id, region, role_arn), None)
+
+    def clear(self):
+        """
+        Remove every cluster from the registry
+        """
+        with self._lock:
+            self._entries = {}
+
+
+default_registry = ClientRegistry()
+
+
+def get_api_client(cluster_id, region, role_arn=None, **kwargs):
+    """
+    Return a ready ApiClient for the cluster from the default registry
+    """
+    return default_registry.get_api_client(cluster_id, region, role_arn=role_arn, **kwargs)
+
+
+def report_error(cluster_id, region, error, role_arn=None):
+    """
+    Report an api error for the cluster to the default registry
+    """
+    return default_registry.report_error(cluster_id, region, error, role_arn=role_arn)
+
+
+def report_result(cluster_id, region, result, role_arn=None):
+    """
+    Report the errors of an OperationResult to the default registry
+    """
+    return default_registry.report_result(cluster_id, region, result, role_arn=role_arn)
@@ -0,0 +1,92 @@
+"""Shared botocore session for lambdakube
+
+The session is created on first use rather than at import time, and its
+credentials are resolved once per process. Inside lambda the execution
+role credentials are read straight from the environment so the botocore
+credential provider chain never runs.
+"""
+import hashlib
+import os
+import threading
+
+LAMBDA_ENV_CREDENTIALS = (
+    'AWS_ACCESS_KEY_ID',
+    'AWS_SECRET_ACCESS_KEY',
+    'AWS_SESSION_TOKEN',
+)
+
+_lock = threading.Lock()
+_session = None
+
+
+def get_session():
+    """
+    Return the botocore session shared by lambdakube, creating it on
+    first use
+    """
+    global _session
+    with _lock:
+        if _session is None:
+            import botocore.session
+
+            session = botocore.session.get_session()
+            credentials = lambda_env_credentials()
+            if credentials is not None:
+                session.set_credentials(*credentials)
+            _session = session
+        return _session
+
+
+def lambda_env_credentials():
+    """
+    Return the (access key, secret key, token) lambda exports for its
+    execution role, or None outside lambda or when a profile is selected
+    """
+    if 'AWS_LAMBDA_FUNCTION_NAME' not in os.environ or 'AWS_PROFILE' in os.environ:
+        return None
+    credentials = tuple(os.environ.get(name) for name in LAMBDA_ENV_CREDENTIALS)
+    if not all(credentials):
+        return None
+    return credentials
+
+
+def credential_identity(session):
+    """
+    Return a digest of the access key of session, for cache keys which
+    must not be shared by sessions with other credentials
+    """
+    credentials = session.get_credentials()
+    access_key = credentials.access_key if credentials is not None else ''
+    return hashlib.sha256((access_key or '').encode('utf-8')).hexdigest()[:16]
+
+
+def refresh_credentials():
+    """
+    Resolve the credentials of the shared session again, keeping the
+    session and the service models its loader has cached. Lambda
+    environment credentials are updated in place, because clients built
+    from the session hold on to its credentials object.
+    """
+    with _lock:
+        session = _session
+    if session is None:
+        return
+    credentials = lambda_env_credentials()
+    # botocore has no public way to forget resolved credentials
+    current = session._credentials
+    if credentials is None:
+        session._credentials = None
+    elif current is None:
+        session.set_credentials(*credentials)
+    else:
+        current.access_key, current.secret_key, current.token = credentials
+
+
+def reset_session():
+    """
+    Drop the shared session so the next get_session call creates a new
+    one and resolves credentials again
+    """
+    global _session
+    with _lock:
+        _session = None
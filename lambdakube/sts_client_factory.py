@@ -1,9 +1,16 @@
+from lambdakube.client_pool import default_client_pool
+from lambdakube.credential_cache import default_credential_cache
+from lambdakube.presigner import Presigner
+from lambdakube.session import credential_identity
+
 CLUSTER_NAME_HEADER = 'x-k8s-aws-id'
 
 
 class STSClientFactory(object):
-    def __init__(self, session):
+    def __init__(self, session, credential_cache=None, client_pool=None):
         self._session = session
+        self._credential_cache = credential_cache or default_credential_cache
+        self._client_pool = client_pool or default_client_pool
 
     def get_sts_client(self, region_name=None, role_arn=None):
         client_kwargs = {
@@ -14,17 +21,47 @@ class STSClientFactory(object):
             client_kwargs['aws_access_key_id'] = creds['AccessKeyId']
             client_kwargs['aws_secret_access_key'] = creds['SecretAccessKey']
             client_kwargs['aws_session_token'] = creds['SessionToken']
-        sts = self._session.create_client('sts', **client_kwargs)
-        self._register_cluster_name_handlers(sts)
-        return sts
+        return self._get_client(**client_kwargs)
+
+    def get_presigner(self, region_name=None, role_arn=None):
+        """
+        Return a Presigner for the resolved credentials, which signs
+        tokens locally without an sts client
+        """
+        region_name = region_name or self._session.get_config_variable('region')
+        if role_arn is not None:
+            credentials = self._get_role_credentials(region_name, role_arn)
+        else:
+            credentials = self._session.get_credentials()
+            if credentials is None:
+                from botocore.exceptions import NoCredentialsError
+                raise NoCredentialsError()
+        return Presigner.from_credentials(credentials, region_name)
 
     def _get_role_credentials(self, region_name, role_arn):
-        sts = self._session.create_client('sts', region_name)
+        # keyed by the identity of the base session too, so a session
+        # which cannot assume the role never gets another session's
+        # role credentials
+        return self._credential_cache.get(
+            (role_arn, region_name, credential_identity(self._session)),
+            lambda: self._assume_role(region_name, role_arn)
+        )
+
+    def _assume_role(self, region_name, role_arn):
+        sts = self._get_client(region_name=region_name)
         return sts.assume_role(
             RoleArn=role_arn,
             RoleSessionName='EKSGetTokenAuth'
         )['Credentials']
 
+    def _get_client(self, **client_kwargs):
+        return self._client_pool.get_client(
+            self._session,
+            'sts',
+            on_create=self._register_cluster_name_handlers,
+            **client_kwargs
+        )
+
     def _register_cluster_name_handlers(self, sts_client):
         sts_client.meta.events.register(
             'provide-client-params.sts.GetCallerIdentity',
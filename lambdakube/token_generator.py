@@ -1,9 +1,24 @@
+from lambdakube.cache import ExpiringCache
+from collections import namedtuple
 import base64
+import time
 
 URL_TIMEOUT = 60
 TOKEN_EXPIRATION_MINS = 14
+TOKEN_REFRESH_MARGIN_SECS = 60
 TOKEN_PREFIX = 'k8s-aws-v1.'
 
+default_token_cache = ExpiringCache()
+
+Token = namedtuple('Token', ['token', 'expiration'])
+
+
+def get_expiration(issued_at=None):
+    """ Return the epoch time at which a token issued at issued_at expires. """
+    if issued_at is None:
+        issued_at = time.time()
+    return issued_at + TOKEN_EXPIRATION_MINS * 60
+
 
 class TokenGenerator(object):
     def __init__(self, sts_client):
@@ -16,6 +31,17 @@ class TokenGenerator(object):
             url.encode('utf-8')).decode('utf-8').rstrip('=')
         return token
 
+    def get_tokens(self, cluster_names):
+        """
+        Generate tokens for many clusters sharing one set of credentials,
+        returning a dict of cluster name to Token
+        """
+        expiration = get_expiration()
+        return {
+            cluster_name: Token(self.get_token(cluster_name), expiration)
+            for cluster_name in cluster_names
+        }
+
     def _get_presigned_url(self, cluster_name):
         return self._sts_client.generate_presigned_url(
             'get_caller_identity',
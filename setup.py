@@ -49,6 +49,11 @@ setup(
         'lambdakube'
         ],
     package_data={'lambdakube': ['fluentd/*.conf']},
+    entry_points={
+        'console_scripts': [
+            'lambdakube=lambdakube.cli:main',
+        ],
+    },
     platforms='any',
     license='LICENSE',
     install_requires=[
@@ -0,0 +1,64 @@
+from concurrent.futures import ThreadPoolExecutor
+from lambdakube.cache import ExpiringCache
+import json
+import os
+import tempfile
+import time
+import unittest
+
+
+class ExpiringCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.key = ('ExampleCluster', 'us-east-1', None)
+        self.cache_dir = tempfile.TemporaryDirectory()
+        self.cache_filepath = os.path.join(self.cache_dir.name, 'cache.json')
+
+    def tearDown(self):
+        self.cache_dir.cleanup()
+
+    def test_get_missing(self):
+        self.assertIsNone(ExpiringCache().get(self.key))
+
+    def test_get(self):
+        cache = ExpiringCache()
+        cache.set(self.key, 'value', time.time() + 600)
+        self.assertEqual(cache.get(self.key), 'value')
+
+    def test_get_expired(self):
+        cache = ExpiringCache()
+        cache.set(self.key, 'value', time.time() - 1)
+        self.assertIsNone(cache.get(self.key))
+
+    def test_get_within_margin(self):
+        cache = ExpiringCache()
+        cache.set(self.key, 'value', time.time() + 30)
+        self.assertIsNone(cache.get(self.key, margin=60))
+        self.assertEqual(cache.get(self.key, margin=10), 'value')
+
+    def test_invalidate(self):
+        cache = ExpiringCache()
+        cache.set(self.key, 'value', time.time() + 600)
+        cache.invalidate(self.key)
+        self.assertIsNone(cache.get(self.key))
+
+    def test_persisted(self):
+        ExpiringCache(self.cache_filepath).set(
+            self.key, 'value', time.time() + 600)
+        self.assertEqual(os.stat(self.cache_filepath).st_mode & 0o777, 0o600)
+        cache = ExpiringCache(self.cache_filepath)
+        self.assertEqual(cache.get(self.key), 'value')
+
+    def test_persisted_concurrently(self):
+        caches = [ExpiringCache(self.cache_filepath) for _ in range(4)]
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            list(pool.map(
+                lambda i: caches[i % 4].set(('cluster', str(i)), 'value', time.time() + 600),
+                range(32)))
+        with open(self.cache_filepath) as infile:
+            self.assertIsInstance(json.load(infile), dict)
+        self.assertEqual(os.listdir(self.cache_dir.name), ['cache.json'])
+
+    def test_persisted_corrupt(self):
+        with open(self.cache_filepath, 'w') as outfile:
+            outfile.write('not json')
+        self.assertIsNone(ExpiringCache(self.cache_filepath).get(self.key))
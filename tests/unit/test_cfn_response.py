@@ -0,0 +1,97 @@
+from lambdakube import cfn_response
+from mock import Mock, patch
+import json
+import unittest
+
+get_session = cfn_response.get_session
+
+
+class CfnResponseTest(unittest.TestCase):
+    def setUp(self):
+        self.event = {
+            'ResponseURL': 'https://bucket.s3.amazonaws.com/response',
+            'StackId': 'stack-id',
+            'RequestId': 'request-id',
+            'LogicalResourceId': 'Resource',
+        }
+        self.context = Mock(log_stream_name='log-stream')
+        self.context.get_remaining_time_in_millis.return_value = 60000
+        self.session = Mock()
+        self.session.put.return_value = Mock(ok=True, reason='OK')
+        patcher = patch.object(cfn_response, 'get_session', return_value=self.session)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_get_session(self):
+        with patch.object(cfn_response, '_sessions', {}):
+            session = get_session()
+            self.assertIs(session, get_session())
+            self.assertIsNot(session, get_session(1))
+            retry = session.get_adapter(self.event['ResponseURL']).max_retries
+        self.assertEqual(retry.total, cfn_response.RETRIES)
+        self.assertIn(503, retry.status_forcelist)
+
+    def test_send(self):
+        self.assertTrue(cfn_response.send(
+            self.event, self.context, cfn_response.SUCCESS, {'Key': 'value'}))
+        args, kwargs = self.session.put.call_args
+        self.assertEqual(args[0], self.event['ResponseURL'])
+        self.assertEqual(kwargs['timeout'], (cfn_response.CONNECT_TIMEOUT_SECS,
+                                             cfn_response.READ_TIMEOUT_SECS))
+        body = json.loads(kwargs['data'])
+        self.assertEqual(body['Status'], 'SUCCESS')
+        self.assertEqual(body['PhysicalResourceId'], 'log-stream')
+        self.assertEqual(body['Data'], {'Key': 'value'})
+
+    def test_send_rejected(self):
+        self.session.put.return_value = Mock(ok=False, status_code=403, reason='Forbidden')
+        self.assertFalse(cfn_response.send(
+            self.event, self.context, cfn_response.SUCCESS, {}))
+
+    def test_send_error(self):
+        self.session.put.side_effect = ConnectionError('unreachable')
+        self.assertFalse(cfn_response.send(
+            self.event, self.context, cfn_response.FAILED, {}))
+
+    def test_max_send_secs(self):
+        self.assertEqual(cfn_response.max_send_secs(), 5 * 20 + 1 + 2 + 4)
+        self.assertEqual(cfn_response.max_send_secs(retries=0, timeout=(1, 2)), 3)
+
+    def test_send_settings(self):
+        timeout = (cfn_response.CONNECT_TIMEOUT_SECS, cfn_response.READ_TIMEOUT_SECS)
+        self.assertEqual(cfn_response.send_settings(None), (cfn_response.RETRIES, timeout))
+        self.assertEqual(cfn_response.send_settings(self.context), (1, timeout))
+        self.context.get_remaining_time_in_millis.return_value = 4500
+        retries, timeout = cfn_response.send_settings(self.context)
+        self.assertEqual(retries, 0)
+        self.assertLessEqual(sum(timeout), 4)
+
+    def test_send_fits_remaining_time(self):
+        self.context.get_remaining_time_in_millis.return_value = 4500
+        with patch.object(cfn_response, 'get_session',
+                          return_value=self.session) as get_session:
+            cfn_response.send(self.event, self.context, cfn_response.SUCCESS, {})
+        get_session.assert_called_once_with(0)
+        self.assertLessEqual(sum(self.session.put.call_args[1]['timeout']), 4)
+
+    def test_response_body_trimmed(self):
+        data = {'small': 'x', 'large': 'x' * 5000, 'medium': 'x' * 100}
+        body = cfn_response.response_body(
+            self.event, self.context, cfn_response.SUCCESS, data)
+        self.assertLessEqual(len(body), cfn_response.MAX_RESPONSE_BYTES)
+        self.assertEqual(json.loads(body)['Data'], {'small': 'x', 'medium': 'x' * 100})
+        self.assertEqual(len(data), 3)
+
+    def test_responder_sends_once(self):
+        responder = cfn_response.Responder(self.event, self.context)
+        self.assertTrue(responder.send(cfn_response.SUCCESS))
+        self.assertFalse(responder.send(cfn_response.FAILED))
+        self.session.put.assert_called_once()
+        self.assertEqual(json.loads(self.session.put.call_args[1]['data'])['Status'],
+                         'SUCCESS')
+
+    def test_responder_background(self):
+        responder = cfn_response.Responder(self.event, self.context)
+        responder.send(cfn_response.SUCCESS, {'Key': 'value'}, background=True)
+        self.assertTrue(responder.wait(timeout=5))
+        self.session.put.assert_called_once()
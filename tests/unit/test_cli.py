@@ -0,0 +1,77 @@
+from lambdakube.cli import get_exec_credential, main
+from lambdakube.presigner import Presigner
+from lambdakube.sts_client_factory import STSClientFactory
+from mock import patch
+import io
+import json
+import os
+import tempfile
+import unittest
+
+
+class CliTest(unittest.TestCase):
+    def setUp(self):
+        self.cache_dir = tempfile.TemporaryDirectory()
+        self.presigner = Presigner('ABCDEFGHIJKLMNOPQRST', 'TSRQPONMLKJUHGFEDCBA')
+        get_presigner_patch = patch.object(
+            STSClientFactory, 'get_presigner', return_value=self.presigner)
+        self.mock_get_presigner = get_presigner_patch.start()
+        self.addCleanup(get_presigner_patch.stop)
+
+    def tearDown(self):
+        self.cache_dir.cleanup()
+
+    def test_get_exec_credential(self):
+        credential = get_exec_credential(
+            'ExampleCluster', region='us-east-1', cache_dir=self.cache_dir.name)
+        self.assertEqual(credential['kind'], 'ExecCredential')
+        self.assertEqual(credential['apiVersion'], 'client.authentication.k8s.io/v1beta1')
+        self.assertTrue(credential['status']['token'].startswith('k8s-aws-v1.'))
+        self.assertTrue(credential['status']['expirationTimestamp'].endswith('Z'))
+
+    def test_get_exec_credential_cached(self):
+        first = get_exec_credential(
+            'ExampleCluster', region='us-east-1', cache_dir=self.cache_dir.name)
+        second = get_exec_credential(
+            'ExampleCluster', region='us-east-1', cache_dir=self.cache_dir.name)
+        self.assertEqual(first, second)
+        self.assertEqual(self.mock_get_presigner.call_count, 1)
+
+    def test_get_exec_credential_keyed_by_role(self):
+        get_exec_credential(
+            'ExampleCluster', region='us-east-1', cache_dir=self.cache_dir.name)
+        get_exec_credential(
+            'ExampleCluster', region='us-east-1', cache_dir=self.cache_dir.name,
+            role_arn='arn:aws:iam::012345678910:role/RoleArn')
+        self.assertEqual(self.mock_get_presigner.call_count, 2)
+
+    def test_get_exec_credential_keyed_by_identity(self):
+        with patch.dict('os.environ', {'AWS_PROFILE': 'first'}):
+            get_exec_credential(
+                'ExampleCluster', region='us-east-1', cache_dir=self.cache_dir.name)
+        with patch.dict('os.environ', {'AWS_PROFILE': 'second'}):
+            get_exec_credential(
+                'ExampleCluster', region='us-east-1', cache_dir=self.cache_dir.name)
+        with patch.dict('os.environ', {'AWS_PROFILE': 'second',
+                                       'AWS_ACCESS_KEY_ID': 'AKIAEXAMPLE'}):
+            get_exec_credential(
+                'ExampleCluster', region='us-east-1', cache_dir=self.cache_dir.name)
+        with patch.dict('os.environ', {'AWS_PROFILE': 'first'}):
+            get_exec_credential(
+                'ExampleCluster', region='us-east-1', cache_dir=self.cache_dir.name)
+        self.assertEqual(self.mock_get_presigner.call_count, 3)
+        self.assertEqual(len(os.listdir(self.cache_dir.name)), 3)
+
+    def test_main_token(self):
+        with patch('sys.stdout', new_callable=io.StringIO) as stdout:
+            code = main(['token', '--cluster-name', 'ExampleCluster',
+                         '--region', 'us-east-1', '--cache-dir', self.cache_dir.name])
+        self.assertEqual(code, 0)
+        self.assertEqual(json.loads(stdout.getvalue())['kind'], 'ExecCredential')
+
+    def test_main_token_error(self):
+        self.mock_get_presigner.side_effect = Exception('no credentials')
+        with patch('sys.stderr', new_callable=io.StringIO) as stderr:
+            code = main(['token', '--cluster-name', 'ExampleCluster', '--no-cache'])
+        self.assertEqual(code, 1)
+        self.assertIn('no credentials', stderr.getvalue())
@@ -0,0 +1,46 @@
+from lambdakube.client_pool import ClientPool
+from mock import Mock
+import unittest
+
+
+class ClientPoolTest(unittest.TestCase):
+    def setUp(self):
+        self.session = Mock()
+        self.session.create_client.side_effect = lambda *args, **kwargs: Mock()
+        self.pool = ClientPool(max_clients=2)
+
+    def test_get_client_reused(self):
+        on_create = Mock()
+        client = self.pool.get_client(self.session, 'sts', 'us-east-1', on_create=on_create)
+        self.assertIs(
+            self.pool.get_client(self.session, 'sts', 'us-east-1', on_create=on_create),
+            client
+        )
+        self.assertEqual(self.session.create_client.call_count, 1)
+        on_create.assert_called_once_with(client)
+
+    def test_get_client_keyed_by_region(self):
+        self.assertIsNot(
+            self.pool.get_client(self.session, 'sts', 'us-east-1'),
+            self.pool.get_client(self.session, 'sts', 'us-west-2')
+        )
+
+    def test_get_client_keyed_by_credentials(self):
+        self.assertIsNot(
+            self.pool.get_client(self.session, 'sts', 'us-east-1',
+                                 aws_access_key_id='AKID1',
+                                 aws_secret_access_key='secret',
+                                 aws_session_token='token'),
+            self.pool.get_client(self.session, 'sts', 'us-east-1',
+                                 aws_access_key_id='AKID2',
+                                 aws_secret_access_key='secret',
+                                 aws_session_token='token'),
+        )
+
+    def test_get_client_evicts_least_recently_used(self):
+        client = self.pool.get_client(self.session, 'sts', 'us-east-1')
+        self.pool.get_client(self.session, 'eks', 'us-east-1')
+        self.pool.get_client(self.session, 'sts', 'us-east-1')
+        self.pool.get_client(self.session, 'sts', 'us-west-2')
+        self.assertIs(self.pool.get_client(self.session, 'sts', 'us-east-1'), client)
+        self.assertEqual(self.session.create_client.call_count, 3)
@@ -34,6 +34,23 @@ class CloudWatchAgentTest(BaseLambdaKubeTest):
         response = self.cloudwatch_agent.create()
         self.assertEqual(len(response), 6)
 
+    def test_create_order(self):
+        self.kube_client.reset_mock()
+        self.cloudwatch_agent.create()
+        calls = [call[0] for call in self.kube_client.method_calls]
+        self.assertEqual(calls[-1], 'create_namespaced_daemon_set')
+        self.assertLess(calls.index('create_namespace'),
+                        calls.index('create_namespaced_service_account'))
+        self.assertLess(calls.index('create_namespaced_service_account'),
+                        calls.index('create_cluster_role_binding'))
+
+    def test_delete_order(self):
+        self.kube_client.reset_mock()
+        self.cloudwatch_agent.delete()
+        calls = [call[0] for call in self.kube_client.method_calls]
+        self.assertLess(calls.index('delete_cluster_role_binding'),
+                        calls.index('delete_namespace'))
+
     def test_namespace(self):
         response = self.cloudwatch_agent._namespace()
         self.assertEqual(response.api_version, 'v1')
@@ -0,0 +1,398 @@
+from kubernetes.client.rest import ApiException
+from kubernetes import client
+from lambdakube.component import (
+    Component, Resource, apply_conflicts, clear_api_clients, dependency_levels,
+    resource_path, server_side_apply, shared_api_client)
+from lambdakube.deadline import Deadline
+from lambdakube.journal import Journal
+from mock import Mock, patch
+import gc
+import json
+import threading
+import unittest
+import weakref
+
+
+def resource(name, depends_on=()):
+    return Resource(name, None, None, None, None, tuple(depends_on))
+
+
+class ExampleComponent(Component):
+    def __init__(self, image='example:1'):
+        self.name = 'example'
+        self.image = image
+        self.calls = []
+
+    def resources(self):
+        return []
+
+    def _create_first(self, **kwargs):
+        self.calls.append(('first', kwargs))
+        return 'first'
+
+    def _create_second(self, **kwargs):
+        self.calls.append(('second', kwargs))
+        raise ApiException(status=409)
+
+    def _create_third(self, **kwargs):
+        self.calls.append(('third', kwargs))
+        return 'third'
+
+    def create(self, deadline=None, journal=None):
+        return self._run([
+            self._create_first,
+            self._create_second,
+            self._create_third,
+        ], deadline, journal)
+
+
+class ResourceComponent(Component):
+    def __init__(self, image='example:1'):
+        self.name = 'example'
+        self.image = image
+        self.calls = []
+
+    def resources(self):
+        return [
+            self._resource('config', self._config),
+            self._resource('deployment', self._deployment, depends_on=['config']),
+        ]
+
+    def _config(self):
+        return {'name': self.name}
+
+    def _deployment(self):
+        return {'name': self.name, 'image': self.image}
+
+    def _create_config(self, **kwargs):
+        self.calls.append('create_config')
+
+    def _patch_config(self, **kwargs):
+        self.calls.append('patch_config')
+
+    def _delete_config(self, **kwargs):
+        self.calls.append('delete_config')
+
+    def _create_deployment(self, **kwargs):
+        self.calls.append('create_deployment')
+
+    def _patch_deployment(self, **kwargs):
+        self.calls.append('patch_deployment')
+
+    def _delete_deployment(self, **kwargs):
+        self.calls.append('delete_deployment')
+
+
+class ApplyComponent(ResourceComponent):
+    def __init__(self, existing=(), missing=()):
+        super(ApplyComponent, self).__init__()
+        self.existing = existing
+        self.missing = missing
+
+    def _create_config(self, **kwargs):
+        super(ApplyComponent, self)._create_config(**kwargs)
+        if 'config' in self.existing:
+            raise ApiException(status=409)
+
+    def _patch_deployment(self, **kwargs):
+        super(ApplyComponent, self)._patch_deployment(**kwargs)
+        if 'deployment' in self.missing:
+            raise ApiException(status=404)
+
+
+class ConcurrentComponent(Component):
+    def __init__(self):
+        self.name = 'concurrent'
+        self.barrier = threading.Barrier(2, timeout=5)
+
+    def resources(self):
+        return [
+            Resource('first', None, self._create_first, None, None, ()),
+            Resource('second', None, self._create_second, None, None, ()),
+        ]
+
+    def _create_first(self, **kwargs):
+        return self.barrier.wait()
+
+    def _create_second(self, **kwargs):
+        return self.barrier.wait()
+
+
+class ApiComponent(Component):
+    def __init__(self, configuration=None):
+        self.configuration = configuration
+
+    def resources(self):
+        return []
+
+    @property
+    def core_v1_api(self):
+        return self._api(client.CoreV1Api)
+
+    @property
+    def apps_v1_api(self):
+        return self._api(client.AppsV1Api)
+
+
+class ComponentTest(unittest.TestCase):
+    def setUp(self):
+        self.component = ExampleComponent()
+
+    def test_run(self):
+        result = self.component.create()
+        self.assertEqual(list(result), ['first', None, 'third'])
+        self.assertEqual(result.completed, ['create_first', 'create_third'])
+        self.assertEqual(result.failed, ['create_second'])
+        self.assertFalse(result.complete)
+        self.assertEqual(self.component.calls[0], ('first', {}))
+
+    def test_run_request_timeout(self):
+        self.component.create(deadline=Deadline.from_timeout(30))
+        for _, kwargs in self.component.calls:
+            self.assertAlmostEqual(kwargs['_request_timeout'], 30, delta=1)
+
+    def test_run_lambda_context(self):
+        context = Mock()
+        context.get_remaining_time_in_millis.return_value = 30000
+        result = self.component.create(deadline=context)
+        self.assertEqual(len(result), 3)
+        self.assertIn('_request_timeout', self.component.calls[0][1])
+
+    def test_run_deadline_exceeded(self):
+        result = self.component.create(deadline=Deadline.from_timeout(0))
+        self.assertEqual(list(result), [])
+        self.assertEqual(result.skipped, ['create_first', 'create_second', 'create_third'])
+        self.assertEqual(result.report()['Skipped'], result.skipped)
+        self.assertEqual(self.component.calls, [])
+
+    def test_spec_hash(self):
+        self.assertEqual(self.component.spec_hash(), ExampleComponent().spec_hash())
+        self.assertNotEqual(self.component.spec_hash(),
+                            ExampleComponent(image='example:2').spec_hash())
+
+    def test_run_journal_unreadable(self):
+        core_v1_api = Mock()
+        core_v1_api.read_namespaced_config_map.side_effect = ApiException(status=401)
+        journal = Journal(None, 'request-id')
+        journal._core_v1_api = core_v1_api
+        result = self.component.create(journal=journal, deadline=Deadline.from_timeout(30))
+        self.assertEqual(result.completed, ['create_first', 'create_third'])
+        self.assertIn('_request_timeout', core_v1_api.read_namespaced_config_map.call_args[1])
+
+    def test_run_journal(self):
+        core_v1_api = Mock()
+        core_v1_api.read_namespaced_config_map.side_effect = ApiException(status=404)
+        with patch.object(Journal, 'core_v1_api', new=core_v1_api):
+            journal = Journal(None, 'request-id')
+            self.component.create(journal=journal)
+            core_v1_api.create_namespaced_config_map.assert_called_once()
+
+            resumed = ExampleComponent()
+            result = resumed.create(journal=journal)
+            self.assertEqual(result.resumed, ['create_first', 'create_third'])
+            self.assertEqual([call[0] for call in resumed.calls], ['second'])
+
+            changed = ExampleComponent(image='example:2')
+            self.assertEqual(len(changed.create(journal=journal)), 3)
+
+    def test_resources(self):
+        component = ResourceComponent()
+        component.create()
+        component.patch()
+        component.delete()
+        self.assertEqual(component.calls, [
+            'create_config', 'create_deployment',
+            'patch_config', 'patch_deployment',
+            'delete_deployment', 'delete_config',
+        ])
+
+    def test_resources_required(self):
+        class MissingResources(Component):
+            pass
+
+        with self.assertRaises(TypeError):
+            MissingResources()
+
+    def test_patch_resources(self):
+        component = ResourceComponent()
+        result = component.patch(resources=['deployment'])
+        self.assertEqual(component.calls, ['patch_deployment'])
+        self.assertEqual(result.completed, ['patch_deployment'])
+
+    def test_changed_resources(self):
+        component = ResourceComponent()
+        self.assertEqual(component.changed_resources(ResourceComponent()), [])
+        self.assertEqual(
+            component.changed_resources(ResourceComponent(image='example:2')),
+            ['deployment'])
+        self.assertEqual(component.changed_resources(None), ['config', 'deployment'])
+
+    def test_api_built_once(self):
+        component = ApiComponent(client.ApiClient())
+        self.assertIs(component.core_v1_api, component.core_v1_api)
+        self.assertIs(component.core_v1_api.api_client, component.configuration)
+        self.assertIs(component.apps_v1_api.api_client, component.configuration)
+
+    def test_api_configuration_changed(self):
+        component = ApiComponent(client.ApiClient())
+        core_v1_api = component.core_v1_api
+        component.configuration = client.ApiClient()
+        self.assertIsNot(component.core_v1_api, core_v1_api)
+        self.assertIs(component.core_v1_api.api_client, component.configuration)
+
+    def test_shared_api_client(self):
+        configuration = client.Configuration()
+        self.assertIs(ApiComponent(configuration).core_v1_api.api_client,
+                      ApiComponent(configuration).apps_v1_api.api_client)
+        self.assertIs(shared_api_client(configuration).configuration, configuration)
+        self.assertIsNot(shared_api_client(configuration),
+                         shared_api_client(client.Configuration()))
+
+    def test_shared_api_client_collected(self):
+        configurations = [client.Configuration() for _ in range(5)]
+        for configuration in configurations:
+            shared_api_client(configuration)
+        references = [weakref.ref(configuration) for configuration in configurations]
+        del configuration, configurations
+        gc.collect()
+        self.assertEqual([reference() for reference in references], [None] * 5)
+
+    def test_shared_default_api_client(self):
+        clear_api_clients()
+        self.addCleanup(clear_api_clients)
+        api_client = shared_api_client()
+        self.assertIs(ApiComponent().core_v1_api.api_client, api_client)
+        clear_api_clients()
+        self.assertIsNot(shared_api_client(), api_client)
+
+    def test_dependency_levels(self):
+        levels = dependency_levels([
+            resource('workload', ['binding', 'config']),
+            resource('namespace'),
+            resource('config', ['namespace']),
+            resource('binding', ['config', 'elsewhere']),
+            resource('role'),
+        ])
+        self.assertEqual([[r.name for r in level] for level in levels], [
+            ['namespace', 'role'], ['config'], ['binding'], ['workload']])
+
+    def test_dependency_levels_reverse(self):
+        levels = dependency_levels(
+            [resource('namespace'), resource('config', ['namespace'])], reverse=True)
+        self.assertEqual([[r.name for r in level] for level in levels],
+                         [['config'], ['namespace']])
+
+    def test_dependency_levels_cycle(self):
+        with self.assertRaises(ValueError):
+            dependency_levels([resource('a', ['b']), resource('b', ['a'])])
+
+    def test_run_level_concurrently(self):
+        result = ConcurrentComponent().create()
+        self.assertEqual(sorted(result), [0, 1])
+        self.assertEqual(result.completed, ['create_first', 'create_second'])
+
+    def test_apply(self):
+        component = ApplyComponent()
+        result = component.apply()
+        self.assertEqual(component.calls, ['create_config', 'create_deployment'])
+        self.assertEqual(result.completed, ['apply_config', 'apply_deployment'])
+
+    def test_apply_existing(self):
+        component = ApplyComponent(existing=['config'])
+        result = component.apply()
+        self.assertEqual(component.calls,
+                         ['create_config', 'patch_config', 'create_deployment'])
+        self.assertTrue(result.complete)
+
+    def test_apply_prefer_patch(self):
+        component = ApplyComponent(missing=['deployment'])
+        result = component.apply(prefer='patch', resources=['deployment'])
+        self.assertEqual(component.calls, ['patch_deployment', 'create_deployment'])
+        self.assertEqual(result.completed, ['apply_deployment'])
+
+    def test_apply_other_error(self):
+        component = ApplyComponent(missing=['deployment'])
+        result = component.apply(prefer='patch')
+        self.assertEqual(result.completed, ['apply_config', 'apply_deployment'])
+        component = ApplyComponent(existing=['config'])
+        component._patch_config = Mock(side_effect=ApiException(status=422))
+        result = component.apply()
+        self.assertEqual(result.failed, ['apply_config'])
+
+    def test_apply_prefer_invalid(self):
+        with self.assertRaises(ValueError):
+            ResourceComponent().apply(prefer='replace')
+
+    def test_resource_path(self):
+        self.assertEqual(
+            resource_path({'apiVersion': 'v1', 'kind': 'Namespace',
+                           'metadata': {'name': 'amazon-cloudwatch'}}),
+            '/api/v1/namespaces/amazon-cloudwatch')
+        self.assertEqual(
+            resource_path({'apiVersion': 'apps/v1', 'kind': 'DaemonSet',
+                           'metadata': {'name': 'fluentd', 'namespace': 'amazon-cloudwatch'}}),
+            '/apis/apps/v1/namespaces/amazon-cloudwatch/daemonsets/fluentd')
+        self.assertEqual(
+            resource_path({'apiVersion': 'rbac.authorization.k8s.io/v1',
+                           'kind': 'ClusterRoleBinding', 'metadata': {'name': 'binding'}}),
+            '/apis/rbac.authorization.k8s.io/v1/clusterrolebindings/binding')
+        self.assertEqual(
+            resource_path({'apiVersion': 'networking.k8s.io/v1', 'kind': 'Ingress',
+                           'metadata': {'name': 'web', 'namespace': 'default'}}),
+            '/apis/networking.k8s.io/v1/namespaces/default/ingresses/web')
+        self.assertEqual(
+            resource_path({'apiVersion': 'networking.k8s.io/v1', 'kind': 'NetworkPolicy',
+                           'metadata': {'name': 'deny', 'namespace': 'default'}}),
+            '/apis/networking.k8s.io/v1/namespaces/default/networkpolicies/deny')
+
+    def test_server_side_apply(self):
+        configuration = client.Configuration()
+        configuration.host = 'https://cluster.example.com'
+        api_client = client.ApiClient(configuration)
+        body = client.V1Namespace(
+            api_version='v1', kind='Namespace', metadata=client.V1ObjectMeta(name='example'))
+        with patch.object(api_client.rest_client.pool_manager, 'request') as request:
+            request.return_value = Mock(status=200, reason='OK', data=b'{"kind": "Namespace"}')
+            response = server_side_apply(api_client, body, force=True, _request_timeout=5)
+        self.assertEqual(response, {'kind': 'Namespace'})
+        args, kwargs = request.call_args
+        self.assertEqual(args[0], 'PATCH')
+        self.assertEqual(
+            args[1],
+            'https://cluster.example.com/api/v1/namespaces/example'
+            '?fieldManager=lambdakube&force=true')
+        self.assertEqual(kwargs['headers']['Content-Type'], 'application/apply-patch+yaml')
+        self.assertEqual(json.loads(kwargs['body']), {
+            'apiVersion': 'v1', 'kind': 'Namespace', 'metadata': {'name': 'example'}})
+
+    def test_server_side_apply_conflict(self):
+        api_client = Mock()
+        api_client.sanitize_for_serialization.return_value = {
+            'apiVersion': 'v1', 'kind': 'ConfigMap',
+            'metadata': {'name': 'config', 'namespace': 'default'}}
+        error = ApiException(status=409)
+        error.body = json.dumps({'details': {'causes': [{
+            'reason': 'FieldManagerConflict',
+            'message': 'conflict with "kubectl"',
+            'field': '.data.key',
+        }]}})
+        api_client.call_api.side_effect = error
+        with self.assertRaises(ApiException):
+            server_side_apply(api_client, {})
+        self.assertEqual(apply_conflicts(error), [('.data.key', 'conflict with "kubectl"')])
+        self.assertEqual(apply_conflicts(ApiException(status=500)), [])
+        query_params = api_client.call_api.call_args[1]['query_params']
+        self.assertEqual(query_params, [('fieldManager', 'lambdakube')])
+
+    def test_apply_server_side(self):
+        component = ResourceComponent()
+        component.configuration = Mock(spec=client.ApiClient)
+        with patch('lambdakube.component.server_side_apply') as apply:
+            result = component.apply(server_side=True, force=True)
+        self.assertEqual(component.calls, [])
+        self.assertEqual(result.completed, ['apply_config', 'apply_deployment'])
+        self.assertEqual(apply.call_count, 2)
+        args, kwargs = apply.call_args_list[0]
+        self.assertIs(args[0], component.configuration)
+        self.assertEqual(args[1], {'name': 'example'})
+        self.assertTrue(kwargs['force'])
@@ -0,0 +1,74 @@
+from datetime import datetime, timedelta, timezone
+from lambdakube.credential_cache import RoleCredentialCache
+from mock import Mock
+import threading
+import time
+import unittest
+
+
+def credentials(expires_in):
+    return {
+        'AccessKeyId': 'ABCDEFGHIJKLMNOPQRST',
+        'SecretAccessKey': 'TSRQPONMLKJUHGFEDCBA',
+        'SessionToken': 'token',
+        'Expiration': datetime.now(timezone.utc) + timedelta(seconds=expires_in),
+    }
+
+
+class RoleCredentialCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.key = ('arn:aws:iam::012345678910:role/RoleArn', 'us-east-1')
+        self.cache = RoleCredentialCache(advisory_refresh=600, mandatory_refresh=120)
+
+    def test_get_cached(self):
+        fetch = Mock(return_value=credentials(3600))
+        first = self.cache.get(self.key, fetch)
+        self.assertIs(self.cache.get(self.key, fetch), first)
+        self.assertEqual(fetch.call_count, 1)
+
+    def test_get_mandatory_refresh(self):
+        fetch = Mock(side_effect=[credentials(60), credentials(3600)])
+        self.cache.get(self.key, fetch)
+        self.cache.get(self.key, fetch)
+        self.assertEqual(fetch.call_count, 2)
+
+    def test_get_advisory_refresh(self):
+        refreshed = threading.Event()
+        current = credentials(300)
+        new = credentials(3600)
+
+        def fetch():
+            if fetch.calls:
+                refreshed.set()
+                return new
+            fetch.calls += 1
+            return current
+        fetch.calls = 0
+
+        self.cache.get(self.key, fetch)
+        self.assertIs(self.cache.get(self.key, fetch), current)
+        self.assertTrue(refreshed.wait(5))
+        for _ in range(100):
+            if self.cache.get(self.key, fetch) is new:
+                break
+            time.sleep(0.01)
+        self.assertIs(self.cache.get(self.key, fetch), new)
+
+    def test_get_concurrent(self):
+        fetch = Mock(return_value=credentials(3600))
+        threads = [
+            threading.Thread(target=self.cache.get, args=(self.key, fetch))
+            for _ in range(10)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(fetch.call_count, 1)
+
+    def test_invalidate(self):
+        fetch = Mock(return_value=credentials(3600))
+        self.cache.get(self.key, fetch)
+        self.cache.invalidate(self.key)
+        self.cache.get(self.key, fetch)
+        self.assertEqual(fetch.call_count, 2)
@@ -0,0 +1,276 @@
+from lambdakube import custom_resource
+from lambdakube.cloudwatch_agent import CloudWatchAgent
+from kubernetes.client.rest import ApiException
+from lambdakube.component import Component, OperationResult
+from mock import Mock, patch
+import ssl
+import threading
+import unittest
+import urllib3.exceptions
+
+calls = []
+
+
+class FakeComponent(Component):
+    def __init__(self, configuration=None, name='fake', image='fake:1', fail=False):
+        self.configuration = configuration
+        self.name = name
+        self.image = image
+        self.fail = fail
+
+    def resources(self):
+        return [self._resource('deployment', self._deployment)]
+
+    def _deployment(self):
+        return {'name': self.name, 'image': self.image}
+
+    def _call(self, operation):
+        if self.fail:
+            raise RuntimeError('failed')
+        calls.append((self.name, operation, threading.current_thread().name))
+
+    def _create_deployment(self, **kwargs):
+        self._call('create')
+
+    def _patch_deployment(self, **kwargs):
+        self._call('patch')
+
+    def _delete_deployment(self, **kwargs):
+        self._call('delete')
+
+
+def event(old, new):
+    return {
+        'RequestType': 'Update',
+        'OldResourceProperties': dict(old, ServiceToken='old-token'),
+        'ResourceProperties': dict(new, ServiceToken='new-token'),
+    }
+
+
+def cloudwatch_agent(properties):
+    return CloudWatchAgent(
+        cluster_name='cluster',
+        region='us-east-1',
+        image=properties.get('Image', 'amazon/cloudwatch-agent:1'),
+    )
+
+
+class CustomResourceTest(unittest.TestCase):
+    def test_changed_properties(self):
+        self.assertEqual(
+            custom_resource.changed_properties(event({'Image': 'a'}, {'Image': 'a'})), [])
+        self.assertEqual(
+            custom_resource.changed_properties(
+                event({'Image': 'a'}, {'Image': 'b', 'Version': '2'})),
+            ['Image', 'Version'])
+        self.assertEqual(custom_resource.changed_properties({}), [])
+
+    def test_plan_update_unchanged(self):
+        factory = Mock()
+        plan = custom_resource.plan_update(event({'Image': 'a'}, {'Image': 'a'}), factory)
+        self.assertEqual(plan, custom_resource.UpdatePlan([], []))
+        factory.assert_not_called()
+
+    def test_plan_update_irrelevant(self):
+        plan = custom_resource.plan_update(
+            event({'Version': '1'}, {'Version': '2'}), cloudwatch_agent)
+        self.assertEqual(plan.properties, ['Version'])
+        self.assertEqual(plan.resources, [])
+
+    def test_plan_update(self):
+        plan = custom_resource.plan_update(
+            event({'Image': 'a'}, {'Image': 'b'}), cloudwatch_agent)
+        self.assertEqual(plan.resources, ['daemonset'])
+
+    def test_update_noop(self):
+        component = Mock()
+        component.changed_resources.return_value = []
+        result = custom_resource.update(
+            event({'Version': '1'}, {'Version': '2'}), lambda properties: component)
+        self.assertEqual(list(result), [])
+        self.assertTrue(result.complete)
+        component.apply.assert_not_called()
+
+    def test_update(self):
+        component = Mock()
+        component.changed_resources.return_value = ['daemonset']
+        result = custom_resource.update(
+            event({'Image': 'a'}, {'Image': 'b'}), lambda properties: component,
+            deadline='context')
+        self.assertEqual(result, component.apply.return_value)
+        component.apply.assert_called_once_with(
+            deadline='context', journal=None, resources=['daemonset'], prefer='patch',
+            server_side=False, force=False)
+
+
+def spec(name, image='fake:1', **properties):
+    return {'Type': 'FakeComponent', 'Properties': dict(properties, Name=name, Image=image)}
+
+
+class DispatcherTest(unittest.TestCase):
+    def setUp(self):
+        del calls[:]
+        self.registry = Mock()
+        self.registry.report_result.return_value = False
+        self.registry.report_error.return_value = False
+        self.dispatcher = custom_resource.Dispatcher(
+            component_types={'FakeComponent': __name__},
+            registry=self.registry,
+            journal=False,
+        )
+
+    def event(self, request_type, components, old_components=None):
+        event = {
+            'RequestType': request_type,
+            'LogicalResourceId': 'Observability',
+            'ResourceProperties': {'ClusterName': 'cluster', 'Region': 'eu-west-1',
+                                   'Components': components},
+        }
+        if old_components is not None:
+            event['OldResourceProperties'] = dict(
+                event['ResourceProperties'], Components=old_components)
+        return event
+
+    def test_component_parameters(self):
+        self.assertEqual(
+            custom_resource.component_parameters(
+                {'DnsDomain': 'example.com', 'VpcId': 'vpc-1', 'Name': 'a'}),
+            {'dns_domain': 'example.com', 'vpc_id': 'vpc-1', 'name': 'a'})
+
+    def test_dispatch_create(self):
+        status, data = self.dispatcher.dispatch(
+            self.event('Create', [spec('a'), spec('b'), spec('c')]))
+        self.assertEqual(status, 'SUCCESS')
+        self.assertEqual(sorted(call[:2] for call in calls),
+                         [('a', 'create'), ('b', 'create'), ('c', 'create')])
+        self.assertEqual(data['a']['Completed'], ['apply_deployment'])
+        self.registry.get_api_client.assert_called_once_with(
+            'cluster', 'eu-west-1', role_arn=None)
+        self.assertEqual(self.registry.report_result.call_count, 3)
+        self.assertEqual(self.registry.report_result.call_args[0][:2], ('cluster', 'eu-west-1'))
+
+    def test_dispatch_delete(self):
+        self.dispatcher.dispatch(self.event('Delete', [spec('a')]))
+        self.assertEqual([call[:2] for call in calls], [('a', 'delete')])
+
+    def test_dispatch_update(self):
+        status, data = self.dispatcher.dispatch(self.event(
+            'Update',
+            [spec('a'), spec('b', image='fake:2'), spec('d')],
+            [spec('a'), spec('b'), spec('c')],
+        ))
+        self.assertEqual(status, 'SUCCESS')
+        self.assertEqual(sorted(call[:2] for call in calls),
+                         [('b', 'patch'), ('c', 'delete'), ('d', 'create')])
+        self.assertNotIn('a', data)
+
+    def test_dispatch_error(self):
+        error = RuntimeError('failed')
+        status, data = self.dispatcher.dispatch(
+            self.event('Create', [spec('a'), spec('b', Fail=True)]))
+        self.assertEqual(status, 'FAILED')
+        self.assertEqual(data['b'], 'Error')
+        self.assertEqual([call[:2] for call in calls], [('a', 'create')])
+        self.assertEqual(self.registry.report_error.call_args[0][:2], ('cluster', 'eu-west-1'))
+        self.assertEqual(str(self.registry.report_error.call_args[0][2]), str(error))
+
+    def test_dispatch_journal(self):
+        dispatcher = custom_resource.Dispatcher(
+            component_types={'FakeComponent': __name__},
+            registry=self.registry,
+        )
+        event = dict(self.event('Create', [spec('a'), spec('b')]), RequestId='request-id')
+        with patch('lambdakube.journal.Journal.from_event') as from_event:
+            journal = from_event.return_value
+            journal.applied.return_value = False
+            status, _ = dispatcher.dispatch(event)
+        self.assertEqual(status, 'SUCCESS')
+        from_event.assert_called_once_with(self.registry.get_api_client.return_value, event)
+        self.assertEqual(journal.record.call_count, 2)
+        journal.delete.assert_called_once_with()
+
+    def test_dispatch_journal_deleted_on_error(self):
+        dispatcher = custom_resource.Dispatcher(
+            component_types={'FakeComponent': __name__},
+            registry=self.registry,
+        )
+        with patch('lambdakube.journal.Journal.from_event') as from_event:
+            with self.assertRaises(ValueError):
+                dispatcher.dispatch(self.event('Create', [{'Type': 'Unknown'}]))
+        from_event.return_value.delete.assert_called_once_with()
+
+    def test_dispatch_failed_operations(self):
+        with patch.object(FakeComponent, '_create_deployment',
+                          side_effect=ApiException(status=403)):
+            status, data = self.dispatcher.dispatch(self.event('Create', [spec('a')]))
+        self.assertEqual(status, 'FAILED')
+        self.assertEqual(data['a']['Failed'], ['apply_deployment'])
+
+        with patch.object(FakeComponent, '_delete_deployment',
+                          side_effect=ApiException(status=500)):
+            status, _ = self.dispatcher.dispatch(self.event('Delete', [spec('a')]))
+        self.assertEqual(status, 'SUCCESS')
+
+    def test_failed_operations(self):
+        result = OperationResult()
+        result.failed = ['delete_service', 'delete_deployment']
+        result.errors = {'delete_service': ApiException(status=404),
+                         'delete_deployment': ApiException(status=403)}
+        self.assertEqual(custom_resource.failed_operations(result), ['delete_deployment'])
+
+    def test_dispatch_retries_evicted(self):
+        self.registry.report_error.side_effect = [True, False]
+        self.registry.get_api_client.side_effect = ['stale', 'fresh']
+        with patch.object(FakeComponent, '_create_deployment',
+                          autospec=True, side_effect=[ConnectionError('reset'), None]) as create:
+            status, data = self.dispatcher.dispatch(self.event('Create', [spec('a')]))
+        self.assertEqual(status, 'SUCCESS')
+        self.assertEqual(data['a']['Completed'], ['apply_deployment'])
+        self.assertEqual(self.registry.get_api_client.call_count, 2)
+        self.assertEqual(create.call_args[0][0].configuration, 'fresh')
+
+    def test_dispatch_retries_failed_operation(self):
+        self.registry.report_result.side_effect = [True, False]
+        error = urllib3.exceptions.MaxRetryError(None, '/', ssl.SSLError('bad certificate'))
+        with patch.object(FakeComponent, '_create_deployment',
+                          side_effect=[error, None]) as create:
+            status, data = self.dispatcher.dispatch(self.event('Create', [spec('a')]))
+        self.assertEqual(create.call_count, 2)
+        self.assertEqual(data['a']['Completed'], ['apply_deployment'])
+        self.assertEqual(data['a']['Failed'], [])
+
+    def test_dispatch_unknown_type(self):
+        with self.assertRaises(ValueError):
+            self.dispatcher.dispatch(self.event('Create', [{'Type': 'Unknown'}]))
+
+    def test_handle(self):
+        event = self.event('Create', [spec('a')])
+        with patch('lambdakube.cfn_response.send') as send:
+            status = self.dispatcher.handle(event, None)
+        self.assertEqual(status, 'SUCCESS')
+        send.assert_called_once()
+        self.assertEqual(send.call_args[1]['physicalResourceId'], 'cluster-Observability')
+
+    def test_handle_unhandled_exception(self):
+        event = self.event('Unknown', [spec('a')])
+        event['PhysicalResourceId'] = 'physical-id'
+        with patch('lambdakube.cfn_response.send') as send:
+            status = self.dispatcher.handle(event, None)
+        self.assertEqual(status, 'FAILED')
+        self.assertEqual(send.call_args[0][2], 'FAILED')
+        self.assertEqual(send.call_args[1]['physicalResourceId'], 'physical-id')
+
+    def test_dispatch_server_side(self):
+        dispatcher = custom_resource.Dispatcher(
+            component_types={'FakeComponent': __name__},
+            registry=self.registry,
+            server_side=True,
+            force=True,
+            journal=False,
+        )
+        with patch.object(FakeComponent, 'apply') as apply:
+            apply.return_value.skipped = []
+            status, _ = dispatcher.dispatch(self.event('Create', [spec('a')]))
+        self.assertEqual(status, 'SUCCESS')
+        self.assertTrue(apply.call_args[1]['server_side'])
+        self.assertTrue(apply.call_args[1]['force'])
@@ -0,0 +1,43 @@
+from lambdakube.deadline import RESERVE_SECS, Deadline, as_deadline
+from lambdakube.exceptions import DeadlineExceeded
+from mock import Mock
+import unittest
+
+
+class DeadlineTest(unittest.TestCase):
+    def test_from_context(self):
+        context = Mock()
+        context.get_remaining_time_in_millis.return_value = 30000
+        deadline = Deadline.from_context(context, reserve=10)
+        self.assertAlmostEqual(deadline.remaining(), 20, delta=1)
+        self.assertFalse(deadline.expired())
+
+    def test_from_context_reserve(self):
+        context = Mock()
+        context.get_remaining_time_in_millis.return_value = 30000
+        self.assertAlmostEqual(
+            Deadline.from_context(context).remaining(), 30 - RESERVE_SECS, delta=1)
+        context.get_remaining_time_in_millis.return_value = 8000
+        self.assertAlmostEqual(Deadline.from_context(context).remaining(), 6, delta=0.5)
+
+    def test_request_timeout(self):
+        deadline = Deadline.from_timeout(30)
+        self.assertAlmostEqual(deadline.request_timeout(), 30, delta=1)
+        self.assertEqual(deadline.request_timeout(max_timeout=5), 5)
+
+    def test_request_timeout_exceeded(self):
+        deadline = Deadline.from_timeout(0.5)
+        with self.assertRaises(DeadlineExceeded):
+            deadline.request_timeout()
+
+    def test_expired(self):
+        self.assertTrue(Deadline.from_timeout(-1).expired())
+
+    def test_as_deadline(self):
+        deadline = Deadline.from_timeout(30)
+        self.assertIs(as_deadline(deadline), deadline)
+        self.assertIsNone(as_deadline(None))
+        self.assertIsNone(as_deadline(''))
+        context = Mock()
+        context.get_remaining_time_in_millis.return_value = 30000
+        self.assertIsInstance(as_deadline(context), Deadline)
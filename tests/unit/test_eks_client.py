@@ -0,0 +1,107 @@
+from lambdakube.cache import ExpiringCache
+from lambdakube.deadline import Deadline
+from lambdakube.eks_client import EKSClient, WAIT_INITIAL_DELAY_SECS, is_stale_cluster_error
+from lambdakube.exceptions import DeadlineExceeded, EKSClusterError
+from mock import Mock, patch
+from tests.unit.test_utils import BaseLambdaKubeTest, describe_cluster_response
+import ssl
+import urllib3.exceptions
+
+
+class EKSClientTest(BaseLambdaKubeTest):
+    def setUp(self):
+        super(EKSClientTest, self).setUp()
+        self.client.describe_cluster.reset_mock()
+        self.eks_client = EKSClient(
+            self.session,
+            self.cluster_id,
+            region_name=self.region,
+            cluster_info_cache=ExpiringCache()
+        )
+
+    def test_get_cluster_info(self):
+        response = self.eks_client.get_cluster_info()
+        self.assertEqual(response, describe_cluster_response())
+
+    def test_get_cached_cluster_info(self):
+        cluster = describe_cluster_response()['cluster']
+        response = self.eks_client.get_cached_cluster_info()
+        self.assertEqual(response['endpoint'], cluster['endpoint'])
+        self.assertEqual(response['arn'], cluster['arn'])
+        self.assertEqual(response['certificateAuthority'], cluster['certificateAuthority'])
+        self.eks_client.get_cached_cluster_info()
+        self.assertEqual(self.client.describe_cluster.call_count, 1)
+
+    def test_get_cached_cluster_info_expired(self):
+        eks_client = EKSClient(
+            self.session,
+            self.cluster_id,
+            region_name=self.region,
+            cluster_info_cache=ExpiringCache(),
+            cluster_info_ttl=0
+        )
+        eks_client.get_cached_cluster_info()
+        eks_client.get_cached_cluster_info()
+        self.assertEqual(self.client.describe_cluster.call_count, 2)
+
+    def test_invalidate(self):
+        self.eks_client.get_cached_cluster_info()
+        self.eks_client.invalidate()
+        self.eks_client.get_cached_cluster_info()
+        self.assertEqual(self.client.describe_cluster.call_count, 2)
+
+    def test_is_stale_cluster_error(self):
+        self.assertTrue(is_stale_cluster_error(ssl.SSLError()))
+        self.assertTrue(is_stale_cluster_error(
+            urllib3.exceptions.MaxRetryError(None, '/', urllib3.exceptions.SSLError())))
+        self.assertFalse(is_stale_cluster_error(ValueError()))
+
+    def cluster_response(self, status):
+        response = describe_cluster_response()
+        response['cluster']['status'] = status
+        return response
+
+    def test_wait_until_active(self):
+        self.client.describe_cluster.side_effect = [
+            self.cluster_response('CREATING'),
+            self.cluster_response('UPDATING'),
+            self.cluster_response('ACTIVE'),
+        ]
+        sleep = Mock()
+        with patch('socket.create_connection') as create_connection:
+            cluster = self.eks_client.wait_until_active(sleep=sleep)
+        self.assertEqual(cluster['status'], 'ACTIVE')
+        self.assertEqual(sleep.call_count, 2)
+        self.assertLessEqual(sleep.call_args_list[1][0][0], 2 * WAIT_INITIAL_DELAY_SECS)
+        create_connection.assert_called_once()
+        self.assertEqual(create_connection.call_args[0][0], ('endpoint.amazonaws.com', 443))
+        self.eks_client.get_cached_cluster_info()
+        self.assertEqual(self.client.describe_cluster.call_count, 3)
+
+    def test_wait_until_active_endpoint_unreachable(self):
+        sleep = Mock()
+        with patch('socket.create_connection') as create_connection:
+            create_connection.side_effect = [ConnectionRefusedError(), Mock()]
+            self.eks_client.wait_until_active(sleep=sleep)
+        self.assertEqual(sleep.call_count, 1)
+        self.assertEqual(self.client.describe_cluster.call_count, 2)
+
+    def test_wait_until_active_terminal(self):
+        for status in ('FAILED', 'DELETING'):
+            self.client.describe_cluster.return_value = self.cluster_response(status)
+            with self.assertRaises(EKSClusterError):
+                self.eks_client.wait_until_active(sleep=Mock())
+
+    def test_wait_until_active_not_found(self):
+        error = Exception('not found')
+        error.response = {'Error': {'Code': 'ResourceNotFoundException'}}
+        self.client.describe_cluster.side_effect = error
+        with self.assertRaises(EKSClusterError):
+            self.eks_client.wait_until_active(sleep=Mock())
+
+    def test_wait_until_active_deadline(self):
+        self.client.describe_cluster.return_value = self.cluster_response('CREATING')
+        sleep = Mock()
+        with self.assertRaises(DeadlineExceeded):
+            self.eks_client.wait_until_active(deadline=Deadline.from_timeout(0), sleep=sleep)
+        sleep.assert_not_called()
@@ -0,0 +1,41 @@
+import subprocess
+import sys
+import unittest
+
+HEAVY_MODULES = ['kubernetes', 'botocore', 'yaml']
+
+
+def imported_modules(statement):
+    """Return the heavy modules loaded by running statement in a new interpreter"""
+    code = (
+        f'{statement}\n'
+        'import sys\n'
+        f'print(",".join(m for m in {HEAVY_MODULES!r} if m in sys.modules))'
+    )
+    output = subprocess.check_output([sys.executable, '-c', code])
+    return [module for module in output.decode('utf-8').strip().split(',') if module]
+
+
+class ImportTest(unittest.TestCase):
+    def test_import_package(self):
+        self.assertEqual(imported_modules('import lambdakube'), [])
+
+    def test_import_cli(self):
+        self.assertEqual(imported_modules('import lambdakube.cli'), [])
+
+    def test_import_component(self):
+        self.assertNotIn(
+            'botocore',
+            imported_modules('import lambdakube.cloudwatch_agent')
+        )
+
+    def test_lazy_attribute(self):
+        self.assertIn(
+            'kubernetes',
+            imported_modules('import lambdakube; lambdakube.CloudWatchAgent')
+        )
+
+    def test_unknown_attribute(self):
+        import lambdakube
+        with self.assertRaises(AttributeError):
+            lambdakube.Unknown
@@ -0,0 +1,78 @@
+from kubernetes.client.rest import ApiException
+from lambdakube.journal import Journal, data_key
+from mock import Mock
+import unittest
+
+
+class JournalTest(unittest.TestCase):
+    def setUp(self):
+        self.core_v1_api = Mock()
+        self.core_v1_api.read_namespaced_config_map.side_effect = ApiException(status=404)
+        self.journal = Journal(None, 'request-id')
+        self.journal._core_v1_api = self.core_v1_api
+
+    def test_name(self):
+        self.assertTrue(self.journal.name.startswith('lambdakube-journal-'))
+        self.assertEqual(self.journal.name, Journal(None, 'request-id').name)
+        self.assertNotEqual(self.journal.name, Journal(None, 'other-request-id').name)
+
+    def test_from_event(self):
+        journal = Journal.from_event(None, {'RequestId': 'request-id'})
+        self.assertEqual(journal.name, self.journal.name)
+
+    def test_applied(self):
+        self.assertFalse(self.journal.applied('component.create_namespace', 'hash'))
+        self.journal.record('component.create_namespace', 'hash')
+        self.assertTrue(self.journal.applied('component.create_namespace', 'hash'))
+        self.assertFalse(self.journal.applied('component.create_namespace', 'other'))
+
+    def test_data_key(self):
+        self.assertEqual(data_key('Agent.agent.create_namespace'), 'Agent.agent.create_namespace')
+        key = data_key('Stack.stack.create_Namespace/amazon-cloudwatch')
+        self.assertRegex(key, r'^Stack\.stack\.create_Namespace\.amazon-cloudwatch\.[0-9a-f]{16}$')
+        self.assertNotEqual(key, data_key('Stack.stack.create_Namespace.amazon-cloudwatch'))
+        self.assertLessEqual(len(data_key('x' * 300)), 253)
+
+    def test_flush_creates_then_patches(self):
+        self.journal.record('component.create_namespace', 'hash')
+        self.journal.flush()
+        body = self.core_v1_api.create_namespaced_config_map.call_args[1]['body']
+        self.assertEqual(body.data, {'component.create_namespace': 'hash'})
+        self.journal.record('component.create_daemonset', 'hash')
+        self.journal.flush()
+        self.core_v1_api.patch_namespaced_config_map.assert_called_once_with(
+            name=self.journal.name,
+            namespace='kube-system',
+            body={'data': {'component.create_daemonset': 'hash'}},
+            pretty=False
+        )
+
+    def test_flush_nothing_pending(self):
+        self.journal.flush()
+        self.core_v1_api.create_namespaced_config_map.assert_not_called()
+
+    def test_load_existing(self):
+        self.core_v1_api.read_namespaced_config_map.side_effect = None
+        self.core_v1_api.read_namespaced_config_map.return_value = Mock(
+            data={'component.create_namespace': 'hash'})
+        self.assertTrue(self.journal.applied('component.create_namespace', 'hash'))
+        self.journal.record('component.create_daemonset', 'hash')
+        self.journal.flush()
+        self.core_v1_api.create_namespaced_config_map.assert_not_called()
+
+    def test_load_timeout(self):
+        self.journal.load(_request_timeout=5)
+        self.assertEqual(
+            self.core_v1_api.read_namespaced_config_map.call_args[1]['_request_timeout'], 5)
+        self.journal.applied('component.create_namespace', 'hash')
+        self.core_v1_api.read_namespaced_config_map.assert_called_once()
+
+    def test_load_error(self):
+        self.core_v1_api.read_namespaced_config_map.side_effect = ApiException(status=503)
+        with self.assertLogs(level='ERROR'):
+            self.journal.load()
+        self.assertFalse(self.journal.applied('component.create_namespace', 'hash'))
+
+    def test_delete_missing(self):
+        self.core_v1_api.delete_namespaced_config_map.side_effect = ApiException(status=404)
+        self.journal.delete()
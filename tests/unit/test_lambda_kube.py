@@ -1,7 +1,18 @@
+from lambdakube.cache import ExpiringCache
 from lambdakube.lambda_kube import (
     LambdaKube, metadata
 )
-from tests.unit.test_utils import BaseLambdaKubeTest
+from lambdakube.presigner import Presigner
+from kubernetes import client
+from tests.unit.test_utils import (
+    BaseLambdaKubeTest, describe_cluster_response, presigned_url
+)
+from concurrent.futures import ThreadPoolExecutor
+from mock import patch
+import base64
+import botocore.session
+import os
+import tempfile
 
 
 class LambdaKubeTest(BaseLambdaKubeTest):
@@ -23,6 +34,178 @@ class LambdaKubeTest(BaseLambdaKubeTest):
             config.configuration.api_key['authorization']
         )
 
+    @patch.object(Presigner, 'presign', return_value=presigned_url())
+    def test_get_token_cached(self, mock_presign):
+        lambdakube = LambdaKube(
+            session=self.session,
+            cluster_id=self.cluster_id,
+            region=self.region,
+            token_cache=ExpiringCache()
+        )
+        token = lambdakube._get_token()
+        self.assertEqual(lambdakube._get_token(), token)
+        self.assertEqual(mock_presign.call_count, 1)
+
+    @patch.object(Presigner, 'presign', side_effect=['https://first', 'https://second'])
+    def test_get_token_keyed_by_session(self, mock_presign):
+        token_cache = ExpiringCache()
+        other_session = botocore.session.Session()
+        other_session.set_credentials('AKIDOTHEREXAMPLE', 'other-secret')
+        tokens = [
+            LambdaKube(
+                session=session,
+                cluster_id=self.cluster_id,
+                region=self.region,
+                token_cache=token_cache
+            )._get_token()
+            for session in (self.session, other_session)
+        ]
+        self.assertNotEqual(tokens[0], tokens[1])
+        self.assertEqual(mock_presign.call_count, 2)
+
+    @patch.object(Presigner, 'presign', side_effect=['https://first', 'https://second'])
+    def test_configuration_refreshes_token(self, mock_presign):
+        token_cache = ExpiringCache()
+        lambdakube = LambdaKube(
+            session=self.session,
+            cluster_id=self.cluster_id,
+            region=self.region,
+            token_cache=token_cache
+        )
+        configuration = lambdakube._kube_client_configuration()
+        first = configuration.get_api_key_with_prefix('authorization')
+        self.assertEqual(configuration.get_api_key_with_prefix('authorization'), first)
+        token_cache.clear()
+        second = configuration.get_api_key_with_prefix('authorization')
+        self.assertTrue(second.startswith('Bearer k8s-aws-v1.'))
+        self.assertNotEqual(second, first)
+        self.assertEqual(mock_presign.call_count, 2)
+
+    def test_get_config_in_memory(self):
+        cluster = describe_cluster_response()['cluster']
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            kube_config_filepath = os.path.join(tmp_dir, 'kubeconfig')
+            lambdakube = LambdaKube(
+                session=self.session,
+                cluster_id=self.cluster_id,
+                region=self.region,
+                kube_config_filepath=kube_config_filepath,
+                ca_cert_dir=tmp_dir
+            )
+            configuration = lambdakube.get_config().configuration
+            self.assertEqual(configuration.host, cluster['endpoint'])
+            with open(configuration.ssl_ca_cert, 'rb') as infile:
+                self.assertEqual(
+                    infile.read(),
+                    base64.b64decode(cluster['certificateAuthority']['data'])
+                )
+            self.assertFalse(os.path.exists(kube_config_filepath))
+
+    def test_get_config_reuses_ca_cert(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            lambdakube = LambdaKube(
+                session=self.session,
+                cluster_id=self.cluster_id,
+                region=self.region,
+                ca_cert_dir=tmp_dir
+            )
+            first = lambdakube.get_config().configuration.ssl_ca_cert
+            with patch('builtins.open') as mock_open:
+                second = lambdakube.get_config().configuration.ssl_ca_cert
+            self.assertEqual(first, second)
+            mock_open.assert_not_called()
+
+    def test_write_ca_cert_concurrently(self):
+        certificate = base64.b64encode(b'certificate').decode('utf-8')
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            lambdakube = LambdaKube(
+                session=self.session,
+                cluster_id=self.cluster_id,
+                region=self.region,
+                ca_cert_dir=tmp_dir
+            )
+            with patch('os.path.exists', return_value=False):
+                with ThreadPoolExecutor(max_workers=8) as pool:
+                    filepaths = set(pool.map(
+                        lambda _: lambdakube._write_ca_cert(certificate), range(32)))
+            self.assertEqual(len(filepaths), 1)
+            self.assertEqual(os.listdir(tmp_dir), [os.path.basename(filepaths.pop())])
+
+    def test_get_config_write_kubeconfig(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            kube_config_filepath = os.path.join(tmp_dir, 'kubeconfig')
+            lambdakube = LambdaKube(
+                session=self.session,
+                cluster_id=self.cluster_id,
+                region=self.region,
+                kube_config_filepath=kube_config_filepath,
+                ca_cert_dir=tmp_dir,
+                write_kubeconfig=True
+            )
+            with patch('kubernetes.config.load_kube_config') as load_kube_config:
+                lambdakube.get_config()
+                self.assertTrue(os.path.exists(kube_config_filepath))
+                with patch.object(lambdakube, '_write_kubeconfig') as write_kubeconfig:
+                    lambdakube.get_config()
+            write_kubeconfig.assert_not_called()
+            load_kube_config.assert_not_called()
+
+    def test_get_config_reused(self):
+        self.assertIs(self.lambdakube.get_config(), self.lambdakube.get_config())
+
+    def test_get_config_isolated(self):
+        default = client.Configuration()
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            lambdakube = LambdaKube(
+                session=self.session,
+                cluster_id=self.cluster_id,
+                region=self.region,
+                kube_config_filepath=os.path.join(tmp_dir, 'kubeconfig'),
+                ca_cert_dir=tmp_dir,
+                write_kubeconfig=True
+            )
+            other = LambdaKube(
+                session=self.session,
+                cluster_id='OtherCluster',
+                region=self.region,
+                ca_cert_dir=tmp_dir
+            )
+            config = lambdakube.get_config()
+            other_config = other.get_config()
+        self.assertIsNot(config, other_config)
+        self.assertIsNot(config.configuration, other_config.configuration)
+        self.assertEqual(client.Configuration().host, default.host)
+        self.assertNotEqual(config.configuration.get_api_key_with_prefix('authorization'),
+                            other_config.configuration.get_api_key_with_prefix('authorization'))
+
+    def test_prime(self):
+        lambdakube = LambdaKube(
+            session=self.session,
+            cluster_id=self.cluster_id,
+            region=self.region,
+            role_arn=self.role_arn,
+            token_cache=ExpiringCache(),
+            cluster_info_cache=ExpiringCache()
+        )
+        self.mock_create_client.reset_mock()
+        self.client.describe_cluster.reset_mock()
+        with patch.object(Presigner, 'presign', return_value=presigned_url()):
+            self.assertIs(lambdakube.prime(), lambdakube)
+        services = [call[0][0] for call in self.mock_create_client.call_args_list]
+        self.assertIn('eks', services)
+        self.assertIn('sts', services)
+        self.client.describe_cluster.assert_called_once_with(name=self.cluster_id)
+
+    def test_wait_until_active(self):
+        lambdakube = LambdaKube(
+            session=self.session,
+            cluster_id=self.cluster_id,
+            region=self.region,
+            cluster_info_cache=ExpiringCache()
+        )
+        self.assertIs(lambdakube.wait_until_active(check_endpoint=False), lambdakube)
+        self.client.describe_cluster.assert_called_with(name=self.cluster_id)
+
     def test_metadata(self):
         labels = dict({'key': 'value'})
         response = metadata(
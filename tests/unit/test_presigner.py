@@ -0,0 +1,84 @@
+from datetime import datetime, timezone
+from lambdakube.presigner import Presigner, sts_endpoint_url
+from lambdakube.sts_client_factory import STSClientFactory
+from lambdakube.token_generator import TokenGenerator
+from mock import patch
+import botocore.auth
+import botocore.session
+import unittest
+
+NOW = datetime(2020, 5, 28, 16, 12, 35, tzinfo=timezone.utc)
+
+
+class PresignerTest(unittest.TestCase):
+    def setUp(self):
+        self.cluster_name = 'MyCluster'
+        self.region = 'us-west-2'
+
+    def botocore_url(self, token=None):
+        session = botocore.session.get_session()
+        session.set_credentials('ABCDEFGHIJKLMNOPQRST', 'TSRQPONMLKJUHGFEDCBA', token)
+        sts_client = session.create_client(
+            'sts',
+            region_name=self.region,
+            endpoint_url=sts_endpoint_url(self.region)
+        )
+        STSClientFactory(session)._register_cluster_name_handlers(sts_client)
+        if hasattr(botocore.auth, 'get_current_datetime'):
+            now = patch('botocore.auth.get_current_datetime', return_value=NOW)
+        else:
+            now = patch('botocore.auth.datetime.datetime', utcnow=lambda: NOW)
+        with now:
+            return sts_client.generate_presigned_url(
+                'get_caller_identity',
+                Params={'ClusterName': self.cluster_name},
+                ExpiresIn=60,
+                HttpMethod='GET',
+            )
+
+    def presigner_url(self, token=None):
+        return Presigner(
+            'ABCDEFGHIJKLMNOPQRST',
+            'TSRQPONMLKJUHGFEDCBA',
+            token,
+            region_name=self.region
+        ).presign(self.cluster_name, 60, now=NOW)
+
+    def test_presign_matches_botocore(self):
+        self.assertEqual(self.presigner_url(), self.botocore_url())
+
+    def test_presign_with_session_token_matches_botocore(self):
+        token = 'session/token+with=reserved chars'
+        self.assertEqual(self.presigner_url(token), self.botocore_url(token))
+
+    def test_signing_key_reused(self):
+        presigner = Presigner('ABCDEFGHIJKLMNOPQRST', 'TSRQPONMLKJUHGFEDCBA')
+        with patch('lambdakube.presigner._sign', wraps=lambda k, m: b'key') as mock_sign:
+            presigner.presign('ClusterA', 60, now=NOW)
+            presigner.presign('ClusterB', 60, now=NOW)
+        self.assertEqual(mock_sign.call_count, 4)
+
+    def test_sts_endpoint_url(self):
+        self.assertEqual(sts_endpoint_url('eu-west-1'), 'https://sts.eu-west-1.amazonaws.com')
+        self.assertEqual(sts_endpoint_url('cn-north-1'),
+                         'https://sts.cn-north-1.amazonaws.com.cn')
+
+    def test_presign_without_region(self):
+        session = botocore.session.Session()
+        session.set_credentials('ABCDEFGHIJKLMNOPQRST', 'TSRQPONMLKJUHGFEDCBA')
+        with patch.object(session, 'get_config_variable', return_value=None):
+            presigner = STSClientFactory(session).get_presigner()
+        url = presigner.presign(self.cluster_name, 60, now=NOW)
+        self.assertTrue(url.startswith('https://sts.amazonaws.com/?'))
+        self.assertIn('%2Fus-east-1%2Fsts%2Faws4_request', url)
+        self.assertEqual(sts_endpoint_url(None), 'https://sts.amazonaws.com')
+
+    def test_token_generator(self):
+        presigner = Presigner('ABCDEFGHIJKLMNOPQRST', 'TSRQPONMLKJUHGFEDCBA')
+        token = TokenGenerator(presigner).get_token(self.cluster_name)
+        self.assertTrue(token.startswith('k8s-aws-v1.'))
+
+    def test_generate_presigned_url_unsupported(self):
+        presigner = Presigner('ABCDEFGHIJKLMNOPQRST', 'TSRQPONMLKJUHGFEDCBA')
+        with self.assertRaises(ValueError):
+            presigner.generate_presigned_url('assume_role', Params={})
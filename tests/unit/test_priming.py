@@ -0,0 +1,29 @@
+from lambdakube.client_pool import default_client_pool
+from lambdakube.lambda_kube import LambdaKube
+from lambdakube.priming import after_restore, prime
+from lambdakube.token_generator import default_token_cache
+from tests.unit.test_utils import BaseLambdaKubeTest
+from mock import patch
+
+
+class PrimingTest(BaseLambdaKubeTest):
+    def test_prime(self):
+        default_token_cache.clear()
+        with patch('lambdakube.lambda_kube.get_session', return_value=self.session):
+            lambdakube = prime(self.cluster_id, self.region)
+            self.assertIsNotNone(default_token_cache.get(lambdakube._token_key()))
+        self.assertIsInstance(lambdakube, LambdaKube)
+        self.assertIsNotNone(lambdakube._api_client)
+
+    def test_after_restore(self):
+        self.lambdakube.get_config()
+        key = self.lambdakube._token_key()
+        after_restore()
+        self.assertIsNone(default_token_cache.get(key))
+        self.mock_create_client.reset_mock()
+        client = default_client_pool.get_client(self.session, 'eks', self.region)
+        self.client.close.reset_mock()
+        after_restore()
+        self.assertIs(default_client_pool.get_client(self.session, 'eks', self.region), client)
+        self.assertEqual(self.mock_create_client.call_count, 1)
+        client.close.assert_called_once_with()
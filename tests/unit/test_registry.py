@@ -0,0 +1,67 @@
+from kubernetes.client.rest import ApiException
+from lambdakube.component import OperationResult
+from lambdakube.registry import ClientRegistry
+from tests.unit.test_utils import BaseLambdaKubeTest
+import ssl
+
+
+class ClientRegistryTest(BaseLambdaKubeTest):
+    def setUp(self):
+        super(ClientRegistryTest, self).setUp()
+        self.registry = ClientRegistry()
+
+    def get_api_client(self, registry=None):
+        return (registry or self.registry).get_api_client(
+            self.cluster_id, self.region, session=self.session)
+
+    def test_get_api_client_reused(self):
+        self.assertIs(self.get_api_client(), self.get_api_client())
+
+    def test_get_api_client_keyed_by_role(self):
+        self.assertIsNot(
+            self.registry.get_lambda_kube(self.cluster_id, self.region),
+            self.registry.get_lambda_kube(self.cluster_id, self.region, role_arn=self.role_arn)
+        )
+
+    def test_get_api_client_expired(self):
+        registry = ClientRegistry(max_age=0)
+        self.assertIsNot(self.get_api_client(registry), self.get_api_client(registry))
+
+    def test_report_auth_error(self):
+        api_client = self.get_api_client()
+        self.assertTrue(self.registry.report_error(
+            self.cluster_id, self.region, ApiException(status=401)))
+        self.assertIsNot(self.get_api_client(), api_client)
+
+    def test_report_connection_error(self):
+        api_client = self.get_api_client()
+        self.assertTrue(self.registry.report_error(
+            self.cluster_id, self.region, ssl.SSLError()))
+        self.assertIsNot(self.get_api_client(), api_client)
+
+    def test_report_other_error(self):
+        api_client = self.get_api_client()
+        self.assertFalse(self.registry.report_error(
+            self.cluster_id, self.region, ApiException(status=409)))
+        self.assertIs(self.get_api_client(), api_client)
+
+    def test_report_forbidden_error(self):
+        api_client = self.get_api_client()
+        self.assertFalse(self.registry.report_error(
+            self.cluster_id, self.region, ApiException(status=403)))
+        self.assertIs(self.get_api_client(), api_client)
+
+    def test_report_result(self):
+        api_client = self.get_api_client()
+        result = OperationResult()
+        result.errors['create_namespace'] = ApiException(status=409)
+        self.assertFalse(self.registry.report_result(self.cluster_id, self.region, result))
+        self.assertIs(self.get_api_client(), api_client)
+        result.errors['create_daemonset'] = ApiException(status=401)
+        self.assertTrue(self.registry.report_result(self.cluster_id, self.region, result))
+        self.assertIsNot(self.get_api_client(), api_client)
+
+    def test_evict(self):
+        api_client = self.get_api_client()
+        self.registry.evict(self.cluster_id, self.region)
+        self.assertIsNot(self.get_api_client(), api_client)
@@ -0,0 +1,54 @@
+from lambdakube.session import (
+    get_session, lambda_env_credentials, refresh_credentials, reset_session
+)
+from mock import patch
+import unittest
+
+LAMBDA_ENVIRON = {
+    'AWS_LAMBDA_FUNCTION_NAME': 'lambdakube',
+    'AWS_ACCESS_KEY_ID': 'ABCDEFGHIJKLMNOPQRST',
+    'AWS_SECRET_ACCESS_KEY': 'TSRQPONMLKJUHGFEDCBA',
+    'AWS_SESSION_TOKEN': 'token',
+}
+
+
+class SessionTest(unittest.TestCase):
+    def setUp(self):
+        reset_session()
+        self.addCleanup(reset_session)
+
+    def test_get_session_shared(self):
+        self.assertIs(get_session(), get_session())
+
+    def test_reset_session(self):
+        session = get_session()
+        reset_session()
+        self.assertIsNot(get_session(), session)
+
+    @patch.dict('os.environ', LAMBDA_ENVIRON, clear=True)
+    def test_refresh_credentials(self):
+        session = get_session()
+        credentials = session.get_credentials()
+        with patch.dict('os.environ', {'AWS_ACCESS_KEY_ID': 'TSRQPONMLKJIHGFEDCBA',
+                                       'AWS_SESSION_TOKEN': 'restored'}):
+            refresh_credentials()
+        self.assertIs(get_session(), session)
+        self.assertIs(session.get_credentials(), credentials)
+        self.assertEqual(credentials.access_key, 'TSRQPONMLKJIHGFEDCBA')
+        self.assertEqual(credentials.token, 'restored')
+
+    @patch.dict('os.environ', LAMBDA_ENVIRON, clear=True)
+    def test_get_session_lambda_credentials(self):
+        with patch('botocore.credentials.create_credential_resolver') as mock_resolver:
+            credentials = get_session().get_credentials()
+        mock_resolver.assert_not_called()
+        self.assertEqual(credentials.access_key, 'ABCDEFGHIJKLMNOPQRST')
+        self.assertEqual(credentials.token, 'token')
+
+    @patch.dict('os.environ', dict(LAMBDA_ENVIRON, AWS_PROFILE='profile'), clear=True)
+    def test_lambda_env_credentials_profile(self):
+        self.assertIsNone(lambda_env_credentials())
+
+    @patch.dict('os.environ', {'AWS_ACCESS_KEY_ID': 'ABCDEFGHIJKLMNOPQRST'}, clear=True)
+    def test_lambda_env_credentials_outside_lambda(self):
+        self.assertIsNone(lambda_env_credentials())
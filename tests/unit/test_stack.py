@@ -0,0 +1,160 @@
+from kubernetes.client.rest import ApiException
+from lambdakube.cloudwatch_agent import CloudWatchAgent
+from lambdakube.component import Component
+from lambdakube.fluentd_agent import FluentdAgent
+from lambdakube.journal import Journal
+from lambdakube.stack import Stack, resource_identity
+from mock import Mock
+import threading
+import unittest
+
+
+class FakeAgent(Component):
+    def __init__(self, name, calls, namespace='monitoring', fail=False):
+        self.name = name
+        self.namespace = namespace
+        self.calls = calls
+        self.fail = fail
+
+    def resources(self):
+        return [
+            self._resource('namespace', self._namespace),
+            self._resource('configmap', self._configmap, depends_on=['namespace']),
+            self._resource('daemonset', self._daemon_set, depends_on=['configmap']),
+        ]
+
+    def _namespace(self):
+        return {'kind': 'Namespace', 'metadata': {'name': self.namespace}}
+
+    def _configmap(self):
+        return {'kind': 'ConfigMap',
+                'metadata': {'name': f'{self.name}-config', 'namespace': self.namespace}}
+
+    def _daemon_set(self):
+        return {'kind': 'DaemonSet',
+                'metadata': {'name': self.name, 'namespace': self.namespace}}
+
+    def _call(self, operation):
+        self.calls.append((self.name, operation, threading.current_thread().name))
+        if self.fail:
+            raise ApiException(status=409)
+
+    def _create_namespace(self, **kwargs):
+        self._call('create_namespace')
+
+    def _patch_namespace(self, **kwargs):
+        self._call('patch_namespace')
+
+    def _delete_namespace(self, **kwargs):
+        self._call('delete_namespace')
+
+    def _create_configmap(self, **kwargs):
+        self._call('create_configmap')
+
+    def _patch_configmap(self, **kwargs):
+        self._call('patch_configmap')
+
+    def _delete_configmap(self, **kwargs):
+        self._call('delete_configmap')
+
+    def _create_daemonset(self, **kwargs):
+        self._call('create_daemonset')
+
+    def _patch_daemonset(self, **kwargs):
+        self._call('patch_daemonset')
+
+    def _delete_daemonset(self, **kwargs):
+        self._call('delete_daemonset')
+
+
+class StackTest(unittest.TestCase):
+    def setUp(self):
+        self.calls = []
+        self.stack = Stack([
+            FakeAgent('metrics', self.calls),
+            FakeAgent('logs', self.calls),
+        ])
+
+    def test_resource_identity(self):
+        self.assertEqual(
+            resource_identity(CloudWatchAgent()._namespace()),
+            ('Namespace', None, 'amazon-cloudwatch'))
+        self.assertEqual(
+            resource_identity(FakeAgent('logs', [])._configmap()),
+            ('ConfigMap', 'monitoring', 'logs-config'))
+
+    def test_resources_deduplicated(self):
+        names = [resource.name for resource in self.stack.resources()]
+        self.assertEqual(names, [
+            'Namespace/monitoring',
+            'ConfigMap/monitoring/metrics-config',
+            'DaemonSet/monitoring/metrics',
+            'ConfigMap/monitoring/logs-config',
+            'DaemonSet/monitoring/logs',
+        ])
+
+    def test_agents_share_namespace(self):
+        stack = Stack([CloudWatchAgent(), FluentdAgent()])
+        names = [resource.name for resource in stack.resources()]
+        self.assertEqual(names.count('Namespace/amazon-cloudwatch'), 1)
+        self.assertIn('DaemonSet/amazon-cloudwatch/cloudwatch-agent', names)
+        self.assertIn('DaemonSet/amazon-cloudwatch/fluentd', names)
+
+    def test_create(self):
+        result = self.stack.create()
+        self.assertTrue(result.complete)
+        self.assertEqual(len(result), 5)
+        operations = [call[:2] for call in self.calls]
+        self.assertEqual(operations[0], ('metrics', 'create_namespace'))
+        self.assertEqual(operations.count(('logs', 'create_namespace')), 0)
+        self.assertEqual(sorted(operations[1:3]),
+                         [('logs', 'create_configmap'), ('metrics', 'create_configmap')])
+        self.assertEqual(set(result.timings), set(result.completed))
+        self.assertIn('create_DaemonSet/monitoring/logs', result.timings)
+
+    def test_journal_keys(self):
+        journal = Journal(None, 'request-id')
+        journal._core_v1_api = Mock()
+        journal._core_v1_api.read_namespaced_config_map.side_effect = ApiException(status=404)
+        self.stack.create(journal=journal)
+        body = journal._core_v1_api.create_namespaced_config_map.call_args[1]['body']
+        self.assertEqual(len(body.data), 5)
+        for key in body.data:
+            self.assertRegex(key, r'^[-._a-zA-Z0-9]+$')
+
+        self.calls.clear()
+        journal._core_v1_api.read_namespaced_config_map.side_effect = None
+        journal._core_v1_api.read_namespaced_config_map.return_value = body
+        resumed = Journal(None, 'request-id')
+        resumed._core_v1_api = journal._core_v1_api
+        result = self.stack.create(journal=resumed)
+        self.assertEqual(len(result.resumed), 5)
+        self.assertEqual(self.calls, [])
+
+    def test_delete(self):
+        self.stack.delete()
+        operations = [call[:2] for call in self.calls]
+        self.assertEqual(operations[-1], ('metrics', 'delete_namespace'))
+
+    def test_max_workers(self):
+        Stack([FakeAgent(f'agent-{i}', self.calls) for i in range(8)], max_workers=2).create()
+        self.assertLessEqual(len({call[2] for call in self.calls}), 2)
+
+    def test_failed(self):
+        stack = Stack([FakeAgent('metrics', self.calls), FakeAgent('logs', self.calls, fail=True)])
+        result = stack.create()
+        self.assertEqual(result.failed, [
+            'create_ConfigMap/monitoring/logs-config',
+            'create_DaemonSet/monitoring/logs',
+        ])
+        self.assertIn('create_DaemonSet/monitoring/logs', result.timings)
+
+    def test_spec_hash(self):
+        self.assertEqual(self.stack.spec_hash(), Stack([
+            FakeAgent('metrics', []),
+            FakeAgent('logs', []),
+        ]).spec_hash())
+        self.assertNotEqual(self.stack.spec_hash(), Stack([
+            FakeAgent('metrics', []),
+            FakeAgent('logs', [], namespace='logging'),
+        ]).spec_hash())
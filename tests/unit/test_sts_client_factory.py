@@ -0,0 +1,40 @@
+from lambdakube.client_pool import ClientPool
+from lambdakube.credential_cache import RoleCredentialCache
+from lambdakube.sts_client_factory import STSClientFactory
+from tests.unit.test_utils import BaseLambdaKubeTest
+import botocore.session
+
+
+class STSClientFactoryTest(BaseLambdaKubeTest):
+    def setUp(self):
+        super(STSClientFactoryTest, self).setUp()
+        self.factory = STSClientFactory(
+            self.session,
+            credential_cache=RoleCredentialCache(),
+            client_pool=ClientPool()
+        )
+
+    def test_get_sts_client_assumes_role_once(self):
+        self.factory.get_sts_client(region_name=self.region, role_arn=self.role_arn)
+        self.factory.get_sts_client(region_name=self.region, role_arn=self.role_arn)
+        self.assertEqual(self.client.assume_role.call_count, 1)
+
+    def test_role_credentials_keyed_by_session(self):
+        other_session = botocore.session.Session()
+        other_session.set_credentials('AKIDOTHEREXAMPLE', 'other-secret')
+        other = STSClientFactory(
+            other_session,
+            credential_cache=self.factory._credential_cache,
+            client_pool=ClientPool()
+        )
+        self.factory.get_presigner(region_name=self.region, role_arn=self.role_arn)
+        other.get_presigner(region_name=self.region, role_arn=self.role_arn)
+        self.assertEqual(self.client.assume_role.call_count, 2)
+
+    def test_get_sts_client_pooled(self):
+        self.mock_create_client.reset_mock()
+        self.client.meta.events.register.reset_mock()
+        sts = self.factory.get_sts_client(region_name=self.region)
+        self.assertIs(self.factory.get_sts_client(region_name=self.region), sts)
+        self.assertEqual(self.mock_create_client.call_count, 1)
+        self.assertEqual(self.client.meta.events.register.call_count, 2)
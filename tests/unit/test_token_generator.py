@@ -1,6 +1,7 @@
 from unittest.mock import patch
 import botocore.session
-from lambdakube.token_generator import TokenGenerator
+from lambdakube.presigner import Presigner
+from lambdakube.token_generator import TokenGenerator, get_expiration
 import unittest
 
 
@@ -20,4 +21,15 @@ class TestTokenGenerator(BaseTokenTest):
     def test_token_no_padding(self, mock_presigned_url):
         generator = TokenGenerator(self._sts_client)
         tok = generator.get_token(self._cluster_name)
-        self.assertTrue('=' not in tok)
\ No newline at end of file
+        self.assertTrue('=' not in tok)
+
+    def test_get_expiration(self):
+        self.assertEqual(get_expiration(issued_at=1000), 1000 + 14 * 60)
+
+    def test_get_tokens(self):
+        presigner = Presigner(self._access_key, self._secret_key, region_name=self._region)
+        tokens = TokenGenerator(presigner).get_tokens(['ClusterA', 'ClusterB'])
+        self.assertEqual(sorted(tokens), ['ClusterA', 'ClusterB'])
+        self.assertNotEqual(tokens['ClusterA'].token, tokens['ClusterB'].token)
+        self.assertEqual(tokens['ClusterA'].expiration, tokens['ClusterB'].expiration)
+        self.assertTrue(tokens['ClusterA'].token.startswith('k8s-aws-v1.'))
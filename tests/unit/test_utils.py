@@ -3,6 +3,7 @@ from unittest.mock import patch
 from mock import patch, Mock
 from lambdakube.lambda_kube import LambdaKube
 from botocore.session import get_session
+from datetime import datetime, timedelta, timezone
 import os
 import unittest
 
@@ -15,6 +16,8 @@ EXAMPLE_USER = 'user@test.com'
 EXAMPLE_ROLE_ARN = 'arn:aws:iam::012345678910:role/RoleArn'
 EXAMPLE_DNS_DOMAIN = 'test.com'
 EXAMPLE_VPC_ID = 'vpc-1234567890'
+EXAMPLE_ACCESS_KEY = 'ABCDEFGHIJKLMNOPQRST'
+EXAMPLE_SECRET_KEY = 'TSRQPONMLKJUHGFEDCBA'
 
 
 class BaseLambdaKubeTest(unittest.TestCase):
@@ -23,10 +26,13 @@ class BaseLambdaKubeTest(unittest.TestCase):
             'botocore.session.Session.create_client'
         )
         self.mock_create_client = self.create_client_patch.start()
+        self.addCleanup(self.create_client_patch.stop)
         self.session = get_session()
+        self.session.set_credentials(EXAMPLE_ACCESS_KEY, EXAMPLE_SECRET_KEY)
         self.client = Mock()
         self.client.describe_cluster.return_value = describe_cluster_response()
         self.client.generate_presigned_url.return_value = presigned_url()
+        self.client.assume_role.return_value = assume_role_response()
         self.mock_create_client.return_value = self.client
         self.cluster_id = EXAMPLE_NAME
         self.region = EXAMPLE_REGION
@@ -171,6 +177,18 @@ def describe_cluster_deleting_response():
     }
 
 
+def assume_role_response():
+    """Get an example assume_role call (For mocking)"""
+    return {
+        "Credentials": {
+            "AccessKeyId": EXAMPLE_ACCESS_KEY,
+            "SecretAccessKey": EXAMPLE_SECRET_KEY,
+            "SessionToken": "token",
+            "Expiration": datetime.now(timezone.utc) + timedelta(hours=1)
+        }
+    }
+
+
 def presigned_url():
     """Return a string representing a presigned url"""
     return 'https://presignedurl.test.com'